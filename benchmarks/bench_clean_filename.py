@@ -0,0 +1,105 @@
+# Checks the fused clean_filename against the original five-pass version on
+# hand-written and randomly generated stems, then compares throughput on
+# unique stems (cold cache) and on a library where every stem comes in
+# several formats (warm cache).
+#
+#   python benchmarks/bench_clean_filename.py [n_stems]
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from book_cleaner import clean_filename
+
+
+def legacy_clean_filename(filename):
+    # Verbatim copy of the original st_book_cleaner.clean_filename
+    filename = re.sub(r'\b978\d{10}\b', '', filename)
+    filename = re.sub(r'\b[a-fA-F0-9]{32}\b', '', filename)
+    filename = re.sub(r"Anna[’']s Archive", '', filename, flags=re.IGNORECASE)
+    filename = re.sub(r'\s*--\s*', ' -- ', filename)
+    filename = re.sub(r'( -- ){2,}', ' -- ', filename)
+    return filename.strip().strip('-').strip()
+
+
+ISBN = "9780261103344"
+HASH = "d41d8cd98f00b204e9800998ecf8427e"
+
+CORPUS = [
+    f"The Hobbit -- J. R. R. Tolkien -- {ISBN} -- Anna's Archive",
+    f"Dune -- Frank Herbert -- {HASH} -- Anna’s Archive",
+    f"Dune -- {ISBN} -- {HASH} -- ANNA'S ARCHIVE",
+    "a -- -- b",
+    "a---b",
+    "a----b",
+    "a ----- b",
+    "-- leading and trailing --",
+    f"{ISBN}{HASH}",
+    f"x{ISBN} {HASH}y",
+    f"{ISBN}Anna's Archive",
+    f"Anna's {ISBN} Archive",
+    f"Anna's{ISBN} Archive",
+    f"{HASH[:31]} {ISBN[:12]}",
+    f"{HASH}0 9780261103344{ISBN}",
+    "\t--\n--\t",
+    "plain title",
+    "",
+]
+
+ALPHABET = ["-", "--", " ", "\t", "a", "Z", "0", "9", "e", "_", ".", "'", "’", ISBN, HASH,
+            "Anna's Archive", "anna’s archive", "978", "Anna", "s Archive"]
+
+
+def random_stems(n, seed=0):
+    rng = random.Random(seed)
+    return ["".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 12))) for _ in range(n)]
+
+
+def library_stems(n, seed=0):
+    rng = random.Random(seed)
+    words = ["The", "Great", "Gatsby", "Fitzgerald", "Dune", "Herbert", "Vol", "2", "Penguin"]
+    stems = []
+    for i in range(n):
+        title = " ".join(rng.choice(words) for _ in range(rng.randint(2, 6)))
+        stems.append(f"{title} {i} -- {ISBN} -- {HASH} -- Anna's Archive")
+    return stems
+
+
+def stems_per_sec(func, stems):
+    start = time.perf_counter()
+    for stem in stems:
+        func(stem)
+    return len(stems) / (time.perf_counter() - start)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    mismatches = 0
+    for stem in CORPUS + random_stems(300_000, seed=1):
+        if clean_filename(stem) != legacy_clean_filename(stem):
+            mismatches += 1
+            sys.stderr.write(f"MISMATCH {stem!r}: {clean_filename(stem)!r} != {legacy_clean_filename(stem)!r}\n")
+    if mismatches:
+        sys.exit(1)
+    print("equivalence: ok")
+
+    unique = library_stems(n)
+    # Each book in three formats, in the order a directory listing returns them
+    variants = [stem for stem in unique[: n // 3] for _ in range(3)]
+
+    legacy = stems_per_sec(legacy_clean_filename, unique)
+    clean_filename.cache_clear()
+    cold = stems_per_sec(clean_filename, unique)
+    clean_filename.cache_clear()
+    legacy_variants = stems_per_sec(legacy_clean_filename, variants)
+    warm = stems_per_sec(clean_filename, variants)
+    print(f"unique stems:          legacy {legacy:,.0f}/s, fused {cold:,.0f}/s ({cold / legacy:.1f}x)")
+    print(f"3 formats per stem:    legacy {legacy_variants:,.0f}/s, fused+LRU {warm:,.0f}/s "
+          f"({warm / legacy_variants:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# Measures what the title extractor CLI costs before it reads its first line:
+# the wall time of importing cli and title_extractor in a fresh interpreter,
+# minus a bare interpreter start, plus the slowest imports according to
+# python -X importtime. Exits with status 1 when the median is over budget.
+#
+#   python benchmarks/bench_cli_import.py [--repeats N] [--budget-ms 100]
+#                                         [--modules cli title_extractor ...]
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+DEFAULT_MODULES = ["cli", "title_extractor"]
+
+
+def run_python(code, *flags):
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, *flags, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return time.perf_counter() - start, proc.stderr
+
+
+def slowest_imports(code, top=10):
+    # -X importtime lines: "import time: self [us] | cumulative | imported package"
+    _, stderr = run_python(code, "-X", "importtime")
+    rows = []
+    for line in stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        rows.append((int(parts[1]), parts[2].rstrip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the import cost of the title extractor CLI.")
+    parser.add_argument("--repeats", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=100.0)
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES)
+    args = parser.parse_args()
+
+    code = "; ".join(f"import {module}" for module in args.modules)
+    bare, loaded = [], []
+    for _ in range(args.repeats):
+        # Interleaved so both see the same machine load
+        bare.append(run_python("pass")[0])
+        loaded.append(run_python(code)[0])
+    cost_ms = (statistics.median(loaded) - statistics.median(bare)) * 1000
+
+    print(f"interpreter start   {statistics.median(bare) * 1000:7.1f} ms")
+    print(f"with {code!r}")
+    print(f"                    {statistics.median(loaded) * 1000:7.1f} ms")
+    print(f"import cost         {cost_ms:7.1f} ms (budget {args.budget_ms:.0f} ms)")
+    print("\nslowest imports (cumulative):")
+    for micros, name in slowest_imports(code):
+        print(f"{micros / 1000:9.1f} ms  {name}")
+
+    if cost_ms > args.budget_ms:
+        print(f"\nover budget by {cost_ms - args.budget_ms:.1f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+# Runs every TOTO data path against the recorded results page served from a
+# local HTTP server and writes per-phase timings, browser round-trips and peak
+# RSS as JSON, so runs from different versions can be compared.
+#
+#   python benchmarks/bench_scrapers.py [-o results.json] [--repeats N]
+#                                       [--backends selenium playwright ...]
+#                                       [--baseline older_results.json]
+#
+# Each backend runs in its own process so the peak RSS of one does not leak
+# into the next. The browser's own memory is only counted once it has exited
+# (RUSAGE_CHILDREN). A backend that cannot start, e.g. because no browser is
+# installed, is recorded with its error and skipped.
+import argparse
+import functools
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from toto_extract import PHASES
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+FIXTURE_PAGE = "toto_results.html"
+# Newest draw on the fixture page
+FIXTURE_LATEST_DRAW = 4070
+BACKENDS = ("selenium", "playwright", "static", "simulated")
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def serve_fixtures():
+    # Query strings are ignored, so every archive URL gets the same page
+    server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(QuietHandler, directory=FIXTURES))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/{FIXTURE_PAGE}"
+
+
+class Patched:
+    # Counts calls to a method for the duration of the block
+    def __init__(self, owner, name, is_async=False):
+        self.owner, self.name, self.is_async = owner, name, is_async
+        self.count = 0
+
+    def __enter__(self):
+        original = self._original = getattr(self.owner, self.name)
+        counter = self
+        if self.is_async:
+            async def counting(*args, **kwargs):
+                counter.count += 1
+                return await original(*args, **kwargs)
+        else:
+            def counting(*args, **kwargs):
+                counter.count += 1
+                return original(*args, **kwargs)
+        setattr(self.owner, self.name, counting)
+        return self
+
+    def __exit__(self, *exc):
+        setattr(self.owner, self.name, self._original)
+
+
+def run_selenium(url, metrics):
+    from selenium.webdriver.remote.webdriver import WebDriver
+    from toto_scraper import scrape_toto_results
+
+    # Every WebDriver command is one HTTP round-trip to chromedriver
+    with Patched(WebDriver, "execute") as trips:
+        df = scrape_toto_results(max_draws=None, url=url, metrics=metrics)
+    return df, trips.count
+
+
+def run_playwright(url, metrics):
+    from playwright._impl import _connection
+    from toto_history import scrape_toto_history
+
+    # The latest page plus one archive page, on one browser page
+    with Patched(_connection.Channel, "_inner_send", is_async=True) as trips:
+        df = scrape_toto_history(FIXTURE_LATEST_DRAW, FIXTURE_LATEST_DRAW, concurrency=1, url=url, metrics=metrics)
+    return df, trips.count
+
+
+def run_static(url, metrics):
+    import requests
+    from toto_html import fetch_results
+
+    with Patched(requests.Session, "send") as trips:
+        df = fetch_results(url, metrics=metrics)
+    return df, trips.count
+
+
+def run_simulated(url, metrics):
+    from toto_store import simulated_draws
+
+    return simulated_draws(metrics=metrics), 0
+
+
+def peak_rss_mb(who):
+    peak = resource.getrusage(who).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def measure(backend, url, repeats):
+    # The first run also pays for imports, so the total is the median run
+    phases = defaultdict(float)
+    run = globals()[f"run_{backend}"]
+    runs = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        df, trips = run(url, lambda phase, seconds: phases.__setitem__(phase, phases[phase] + seconds))
+        runs.append(time.perf_counter() - start)
+    return {
+        "rows": len(df),
+        "total_ms": round(statistics.median(runs) * 1000, 3),
+        "runs_ms": [round(r * 1000, 3) for r in runs],
+        "phases_ms": {phase: round(phases[phase] / repeats * 1000, 3) for phase in PHASES if phase in phases},
+        "round_trips": trips,
+        "peak_rss_mb": peak_rss_mb(resource.RUSAGE_SELF),
+        "peak_child_rss_mb": peak_rss_mb(resource.RUSAGE_CHILDREN),
+    }
+
+
+def run_in_child(backend, url, repeats):
+    proc = subprocess.run(
+        [sys.executable, __file__, "--child", backend, "--url", url, "--repeats", str(repeats)],
+        capture_output=True, text=True,
+    )
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode or not lines:
+        return {"error": f"exit code {proc.returncode}"}
+    return json.loads(lines[-1])
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    print(f"\nvs {baseline_path} (ratio new/old, lower is better)")
+    for backend, result in results.items():
+        old = baseline.get(backend, {})
+        if "error" in result or "error" in old or not old:
+            continue
+        ratios = [f"total {result['total_ms'] / old['total_ms']:.2f}x"]
+        ratios += [
+            f"{phase} {ms / old['phases_ms'][phase]:.2f}x"
+            for phase, ms in result["phases_ms"].items() if old["phases_ms"].get(phase)
+        ]
+        print(f"{backend:<11} " + ", ".join(ratios))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the TOTO scraper backends on a local fixture site.")
+    parser.add_argument("-o", "--output", default="bench_scrapers.json")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    parser.add_argument("--child", choices=BACKENDS, help=argparse.SUPPRESS)
+    parser.add_argument("--url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        try:
+            result = measure(args.child, args.url, args.repeats)
+        except Exception as exc:
+            message = str(exc).strip().splitlines()
+            result = {"error": f"{type(exc).__name__}: {message[0] if message else ''}"}
+        print(json.dumps(result))
+        return
+
+    server, url = serve_fixtures()
+    try:
+        results = {backend: run_in_child(backend, url, args.repeats) for backend in args.backends}
+    finally:
+        server.shutdown()
+
+    for backend, result in results.items():
+        if "error" in result:
+            print(f"{backend:<11} skipped: {result['error']}")
+            continue
+        phases = ", ".join(f"{phase} {ms:.1f}" for phase, ms in result["phases_ms"].items())
+        print(f"{backend:<11} {result['rows']} rows, {result['total_ms']:.1f} ms ({phases}), "
+              f"{result['round_trips']} round-trips, peak RSS {result['peak_rss_mb']} MB "
+              f"+ {result['peak_child_rss_mb']} MB in child processes")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeats": args.repeats,
+            "results": results,
+        }, f, indent=2)
+    print(f"results written to {args.output}")
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
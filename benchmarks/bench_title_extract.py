@@ -0,0 +1,134 @@
+# Checks TitleParser against the original extract_title on an equivalence
+# corpus, then compares lines/sec on a generated 1M-line book list.
+#
+#   python benchmarks/bench_title_extract.py [n_lines]
+import contextlib
+import io
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from title_extractor import TitleParser
+
+
+def legacy_extract_title(line: str) -> str:
+    # Verbatim copy of the original st_extract_bk_name_v2.extract_title
+    if '--' in line or re.search(r' - [^-]+ - ', line):
+        title = re.split(r"--| - [^-]+ - ", line)[0].strip()
+        print ("title 1:", title[0])
+    else:
+        parts = line.split(" - ", 1)
+        title = parts[1].strip() if len(parts) > 1 else line.strip()
+        print ("parts [0] :", parts[0])
+        print ("title 2", title[0])
+
+    return title
+
+
+CORPUS = [
+    "Jane Austen - Pride and Prejudice",
+    "Pride and Prejudice -- Jane Austen -- 1813 -- Anna's Archive",
+    "The Hobbit - J. R. R. Tolkien - 9780261103344",
+    "Dune - Frank Herbert - Chilton - 1965.epub",
+    "Solaris",
+    "  padded title  ",
+    "Author Name - Title - with - many - dashes",
+    "Title--NoSpaces",
+    "Title -- ",
+    "Title - - x",
+    "Title - x-y - z",
+    "Title - x - ",
+    "A - B",
+    "A -B - C",
+    "A- B - C",
+    "Self-Help for Beginners - Someone",
+    "Self-Help -- Someone",
+    "Crime and Punishment - Fyodor Dostoevsky - Penguin -- 2003",
+    "Tolstoy - War and Peace - Volume 1 -- 1869",
+    "漢字のタイトル - 著者 - 出版社",
+    "Émile Zola - Germinal",
+    "a - b - c - d",
+    "a --- b",
+    "x - y --",
+    "\tTabbed - Title\t",
+]
+
+WORDS = ["The", "Great", "Gatsby", "Scott", "Fitzgerald", "1925", "epub", "Vol.", "II",
+         "Self-Help", "-", "--", "Anna's", "Archive", "9780743273565", "e-book", "x"]
+
+
+def generated_lines(n, seed=0):
+    rng = random.Random(seed)
+    seps = [" - ", " -- ", "--", " ", " ", " "]
+    lines = []
+    for _ in range(n):
+        parts = [rng.choice(WORDS)]
+        for _ in range(rng.randint(1, 8)):
+            parts.append(rng.choice(seps))
+            parts.append(rng.choice(WORDS))
+        lines.append("".join(parts))
+    return lines
+
+
+def safe(func, line):
+    try:
+        return func(line)
+    except IndexError:
+        # The original prints title[0] and crashes on empty titles
+        return IndexError
+
+
+def check_equivalence(lines):
+    parser = TitleParser()
+    mismatches = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        for line in lines:
+            expected = safe(legacy_extract_title, line)
+            if expected is IndexError:
+                continue
+            if parser.parse(line) != expected or parser.parse_many([line]) != [expected]:
+                mismatches += 1
+                sys.stderr.write(f"MISMATCH {line!r}: {parser.parse(line)!r} != {expected!r}\n")
+    return mismatches
+
+
+def lines_per_sec(func, lines):
+    start = time.perf_counter()
+    for line in lines:
+        func(line)
+    return len(lines) / (time.perf_counter() - start)
+
+
+def batch_lines_per_sec(func, lines):
+    start = time.perf_counter()
+    func(lines)
+    return len(lines) / (time.perf_counter() - start)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    if check_equivalence(CORPUS + generated_lines(200_000, seed=1)):
+        sys.exit(1)
+    print("equivalence: ok")
+
+    parser = TitleParser()
+    # Skip the lines the original crashes on (empty titles)
+    lines = [line for line in generated_lines(n) if parser.parse(line)]
+    # The original prints to stdout; send it to /dev/null so the baseline is not
+    # bounded by the terminal
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        legacy = lines_per_sec(legacy_extract_title, lines)
+    parsed = lines_per_sec(parser.parse, lines)
+    batched = batch_lines_per_sec(parser.parse_many, lines)
+    print(f"lines: {len(lines)}")
+    print(f"legacy extract_title:   {legacy:,.0f} lines/sec")
+    print(f"TitleParser.parse:      {parsed:,.0f} lines/sec ({parsed / legacy:.1f}x)")
+    print(f"TitleParser.parse_many: {batched:,.0f} lines/sec ({batched / legacy:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
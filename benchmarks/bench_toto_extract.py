@@ -0,0 +1,104 @@
+# Compares the old per-element locator extraction with the single evaluate()
+# call from toto_extract on the recorded results page, counting the protocol
+# messages (browser round-trips) each one sends.
+#
+#   python benchmarks/bench_toto_extract.py [repeats]
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from playwright._impl import _connection
+from playwright.sync_api import sync_playwright
+
+from toto_extract import draw_records, extract_blocks_playwright
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "toto_results.html")
+
+
+class RoundTripCounter:
+    # Counts every message Playwright sends to the browser. This patches a
+    # private method, which is fine for a benchmark but nothing else.
+    def __init__(self):
+        self.count = 0
+        self._original = _connection.Channel._inner_send
+
+    def __enter__(self):
+        counter = self
+        original = self._original
+
+        async def counting_send(channel, *args, **kwargs):
+            counter.count += 1
+            return await original(channel, *args, **kwargs)
+
+        _connection.Channel._inner_send = counting_send
+        return self
+
+    def __exit__(self, *exc):
+        _connection.Channel._inner_send = self._original
+
+
+def legacy_extract(page):
+    # The per-element loop the Playwright scraper used before toto_extract
+    blocks = page.locator(".drawresult")
+    count = blocks.count()
+    results = []
+    for i in range(count):
+        block = blocks.nth(i)
+        header = block.locator(".drawresultheader").text_content().strip()
+        draw_date = header.split("TOTO Draw")[0].strip()
+        numbers = block.locator(".drawnumber span")
+        if numbers.count() < 7:
+            continue
+        win_nums = [numbers.nth(j).text_content() for j in range(numbers.count() - 1)]
+        add_num = numbers.nth(numbers.count() - 1).text_content()
+        group1_winners = "Unknown"
+        rows = block.locator("table tr")
+        for r in range(rows.count()):
+            row = rows.nth(r)
+            if "Group 1" in row.text_content():
+                group1_winners = row.locator("td").nth(2).text_content().strip()
+                break
+        results.append({
+            "Draw Number": count - i,
+            "Date": draw_date,
+            "Winning Numbers": ", ".join(win_nums),
+            "Additional Number": add_num,
+            "Group 1 Winners": group1_winners,
+        })
+    return results
+
+
+def measure(extract, page, repeats):
+    with RoundTripCounter() as counter:
+        start = time.perf_counter()
+        for _ in range(repeats):
+            rows = extract(page)
+        elapsed = (time.perf_counter() - start) / repeats
+    return rows, counter.count // repeats, elapsed
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    with open(FIXTURE, encoding="utf-8") as f:
+        html = f.read()
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        page = browser.new_page()
+        page.set_content(html)
+
+        old_rows, old_trips, old_time = measure(legacy_extract, page, repeats)
+        new_rows, new_trips, new_time = measure(lambda pg: draw_records(extract_blocks_playwright(pg)), page, repeats)
+        browser.close()
+
+    columns = ["Date", "Winning Numbers", "Additional Number", "Group 1 Winners"]
+    same = [{c: r[c] for c in columns} for r in old_rows] == [{c: r[c] for c in columns} for r in new_rows]
+    print(f"draw blocks: {len(new_rows)}, same rows: {same}")
+    print(f"locator loop: {old_trips} round-trips, {old_time * 1000:.1f} ms")
+    print(f"evaluate():   {new_trips} round-trips, {new_time * 1000:.1f} ms")
+    print(f"saved:        {old_trips - new_trips} round-trips per page")
+
+
+if __name__ == "__main__":
+    main()
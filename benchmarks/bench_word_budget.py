@@ -0,0 +1,93 @@
+# Compares the original word-budget loop of generate_scene_from_lyric (split the
+# whole scene after every appended detail, += concatenation) with
+# storyboard_engine.fit_word_budget as the target length grows, for both the
+# padding path and the trimming path. Outputs are checked to be identical.
+#
+#   python benchmarks/bench_word_budget.py [repeats]
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from storyboard_engine import ADDITIONAL_DETAILS, fit_word_budget
+
+TARGETS = [50, 100, 200, 400, 800, 1600, 3200, 6400]
+BASE = [
+    'Scene inspired by "hold on to the night": A misty Twilight over a quiet lake beneath a Dancer under '
+    "spotlight drifts in a Dreamlike haze. The scene shimmers with Watercolor painting aesthetic, amidst "
+    "Fireflies glowing at dusk. ",
+    "The visual metaphor reinforces the lyric's sentiment of longing.",
+    " The frame could fade gently to the next scene.",
+]
+
+
+def legacy_fit(scene, details, min_words, max_words):
+    # The original padding and trimming, except that the details come in a
+    # given order instead of through random.choice
+    current_words = len(scene.split())
+
+    if current_words < min_words:
+        additional_details = list(details)
+        while current_words < min_words and additional_details:
+            detail = additional_details[0]
+            additional_details.remove(detail)
+            scene += detail
+            current_words = len(scene.split())
+
+    elif current_words > max_words:
+        words = scene.split()
+        trimmed_words = words[:max_words]
+        last_period_index = " ".join(trimmed_words).rfind(".")
+        if last_period_index > 0:
+            scene = " ".join(trimmed_words)[:last_period_index + 1]
+        else:
+            scene = " ".join(trimmed_words) + "."
+
+    return scene
+
+
+def make_details(n, seed=0):
+    rng = random.Random(seed)
+    details = []
+    for _ in range(n):
+        text, slots = rng.choice(ADDITIONAL_DETAILS)
+        details.append(text.format(*(rng.choice(options) for options in slots)))
+    return details
+
+
+def best_of(repeats, fn):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    # Enough details to reach the largest target (about 9 words each)
+    details = make_details(TARGETS[-1] // 5)
+
+    print("padding: short scene, details appended until the target is reached")
+    print(f"{'target':>8} {'legacy ms':>11} {'linear ms':>11} {'speed-up':>9}")
+    for target in TARGETS:
+        old, old_time = best_of(repeats, lambda: legacy_fit("".join(BASE), details, target, target * 2))
+        new, new_time = best_of(repeats, lambda: fit_word_budget(BASE, iter(details), target, target * 2))
+        assert old == new
+        print(f"{target:>8} {old_time * 1000:>11.3f} {new_time * 1000:>11.3f} {old_time / new_time:>8.1f}x")
+
+    print("\ntrimming: long scene cut back to the target")
+    long_parts = BASE + details
+    print(f"{'target':>8} {'legacy ms':>11} {'linear ms':>11} {'speed-up':>9}")
+    for target in TARGETS:
+        old, old_time = best_of(repeats, lambda: legacy_fit("".join(long_parts), [], 1, target))
+        new, new_time = best_of(repeats, lambda: fit_word_budget(long_parts, (), 1, target))
+        assert old == new
+        print(f"{target:>8} {old_time * 1000:>11.3f} {new_time * 1000:>11.3f} {old_time / new_time:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,464 @@
+import json
+import os
+import re
+import sqlite3
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from functools import lru_cache
+from pathlib import Path
+
+# Directory listings are I/O bound (especially on network mounts), so a
+# thread pool overlaps the round-trips
+SCAN_WORKERS = 16
+RENAME_WORKERS = 8
+
+# Journals (and other bookkeeping) live in this folder inside the cleaned
+# directory; the scanner never descends into it
+STATE_DIR = ".book_cleaner"
+INDEX_NAME = "index.sqlite"
+# Folder mtimes younger than this are not trusted by the incremental scan
+RACY_MTIME_NS = 2_000_000_000
+
+# rename_files_in_directory result: applied (old, new) pairs, steps skipped
+# because of a name collision, and steps whose rename raised
+CleanResult = namedtuple("CleanResult", ["renamed", "conflicts", "failed"])
+# A collision: the step that was held back and why
+Conflict = namedtuple("Conflict", ["root", "old_name", "new_name", "reason"])
+
+
+# Noise tokens, removed in one pass: 13-digit ISBNs, 32-character hex hashes and
+# "Anna’s Archive" (straight or curly apostrophe, any case). Matches of the
+# three kinds can never overlap or create one another, so a single pass gives
+# the same result as removing them one kind at a time.
+NOISE_RE = re.compile(r"\b978\d{10}\b|\b[a-fA-F0-9]{32}\b|(?i:Anna[’']s Archive)")
+# A run of '--' separators (with any surrounding whitespace) collapses to one ' -- '
+SEPARATOR_RE = re.compile(r"(?:\s*--\s*)+")
+# Stems are often shared by several formats of the same book (.epub/.pdf/.mobi)
+CLEAN_CACHE_SIZE = 65536
+
+
+@lru_cache(maxsize=CLEAN_CACHE_SIZE)
+def clean_filename(filename):
+    filename = NOISE_RE.sub('', filename)
+    if '--' in filename:
+        filename = SEPARATOR_RE.sub(' -- ', filename)
+    return filename.strip().strip('-').strip()
+
+
+def _scan_dir(path):
+    # One os.scandir call per directory. DirEntry caches the file type from the
+    # listing, so telling files from folders costs no extra stat calls (only
+    # symlinks are followed with a stat, the same as os.walk/os.path.isfile).
+    files = []
+    subdirs = []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir():
+                        # Like os.walk, don't descend into symlinked folders
+                        if not entry.is_symlink() and entry.name != STATE_DIR:
+                            subdirs.append(entry.path)
+                    elif entry.is_file():
+                        files.append(entry.name)
+                except OSError:
+                    continue
+    except OSError:
+        # os.walk silently skips folders it cannot list
+        pass
+    return path, files, subdirs
+
+
+def scan_tree(directory, workers=SCAN_WORKERS, progress=None):
+    # Phase one: list every file under `directory` as (folder, filename), scanning
+    # folders in parallel. progress("scan", scanned, known) is called from the
+    # calling thread, so it is safe to update Streamlit widgets from it.
+    found = []
+    scanned = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {pool.submit(_scan_dir, directory)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path, files, subdirs = future.result()
+                found.extend((path, name) for name in files)
+                pending.update(pool.submit(_scan_dir, subdir) for subdir in subdirs)
+                scanned += 1
+            if progress:
+                progress("scan", scanned, scanned + len(pending))
+    return found
+
+
+class ScanIndex:
+    # Persistent per-folder record kept in STATE_DIR/index.sqlite: the folder's
+    # mtime when it was last listed, its subfolders, the file names in it that
+    # are already clean, and the ones that still need renaming (held back by a
+    # collision or a failed rename). A folder's mtime only changes when entries
+    # are added, removed or renamed in it, which is exactly when it needs a
+    # fresh listing. With read_only (dry runs) nothing is written to the
+    # library: an existing index is only read, a missing one is not created.
+    def __init__(self, directory, read_only=False):
+        path = os.path.join(directory, STATE_DIR, INDEX_NAME)
+        self.read_only = read_only
+        self.folders = {}
+        if read_only:
+            self._db = sqlite3.connect(Path(path).resolve().as_uri() + "?mode=ro", uri=True) \
+                if os.path.exists(path) else None
+        else:
+            os.makedirs(os.path.join(directory, STATE_DIR), exist_ok=True)
+            self._db = sqlite3.connect(path)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS folders ("
+                "path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL, subdirs TEXT NOT NULL, "
+                "clean TEXT NOT NULL, pending TEXT NOT NULL)"
+            )
+        if self._db is None:
+            return
+        # Everything except the clean names, which are only loaded for folders
+        # that changed. Read-only while a scan runs, so scanner threads can share it.
+        self.folders = {
+            path: (mtime_ns, json.loads(subdirs), json.loads(pending))
+            for path, mtime_ns, subdirs, pending in self._db.execute(
+                "SELECT path, mtime_ns, subdirs, pending FROM folders")
+        }
+
+    def clean_names(self, path):
+        if self._db is None:
+            return set()
+        row = self._db.execute("SELECT clean FROM folders WHERE path = ?", (path,)).fetchone()
+        return set(json.loads(row[0])) if row else set()
+
+    def save(self, path, mtime_ns, subdirs, clean, pending):
+        self._db.execute(
+            "INSERT OR REPLACE INTO folders VALUES (?, ?, ?, ?, ?)",
+            (path, mtime_ns, json.dumps(subdirs), json.dumps(sorted(clean)), json.dumps(sorted(pending))),
+        )
+
+    def prune(self, visited):
+        # Forget folders that no longer exist
+        gone = [(path,) for path in self.folders if path not in visited]
+        self._db.executemany("DELETE FROM folders WHERE path = ?", gone)
+
+    def close(self):
+        if self._db is None:
+            return
+        if not self.read_only:
+            self._db.commit()
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _scan_dir_if_changed(path, folders):
+    # stat first, then list: if an entry appears in between, the listing has it
+    # and the older mtime just makes the next run list the folder again
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError:
+        return path, None, [], None
+    known = folders.get(path)
+    if known and known[0] == mtime_ns:
+        return path, mtime_ns, known[1], None
+    _, files, subdirs = _scan_dir(path)
+    return path, mtime_ns, subdirs, files
+
+
+def scan_changed(directory, index, workers=SCAN_WORKERS, progress=None):
+    # Incremental phase one. Costs one stat per folder; only folders whose mtime
+    # differs from the index are listed, and only names not already known to be
+    # clean are returned as candidates. Returns (candidates, listings, visited)
+    # where listings maps each folder that has candidates to
+    # (mtime_ns, subdirs, every file name in it) for collision checks and for
+    # updating the index afterwards.
+    candidates = []
+    listings = {}
+    visited = set()
+    scanned = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {pool.submit(_scan_dir_if_changed, directory, index.folders)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path, mtime_ns, subdirs, files = future.result()
+                scanned += 1
+                if mtime_ns is None:
+                    continue
+                visited.add(path)
+                pending.update(pool.submit(_scan_dir_if_changed, subdir, index.folders) for subdir in subdirs)
+                if files is None:
+                    # Unchanged folder: only names held back last time
+                    held_back = index.folders[path][2]
+                    if held_back:
+                        listings[path] = (mtime_ns, subdirs, list(index.clean_names(path)) + held_back)
+                        candidates.extend((path, name) for name in held_back)
+                else:
+                    clean = index.clean_names(path) if path in index.folders else set()
+                    listings[path] = (mtime_ns, subdirs, files)
+                    candidates.extend((path, name) for name in files if name not in clean)
+            if progress:
+                progress("scan", scanned, scanned + len(pending))
+    return candidates, listings, visited
+
+
+def update_index(index, listings, visited, applied, held_back):
+    # Record the post-run state of every folder that was listed. `applied` are
+    # the (root, old, new) renames that happened, `held_back` the (root, name)
+    # files that still need renaming.
+    renames = {}
+    for root, old, new in applied:
+        renames.setdefault(root, []).append((old, new))
+    still_pending = {}
+    for root, name in held_back:
+        still_pending.setdefault(root, set()).add(name)
+
+    for path, (mtime_ns, subdirs, names) in listings.items():
+        names = set(names)
+        if path in renames:
+            for old, new in renames[path]:
+                names.discard(old)
+                names.add(new)
+            # Our own renames changed the folder's mtime
+            try:
+                mtime_ns = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+        # On filesystems with coarse timestamps a change in the same tick would
+        # go unnoticed, so folders modified moments ago are listed again next time
+        if time.time_ns() - mtime_ns < RACY_MTIME_NS:
+            mtime_ns = -1
+        pending = still_pending.get(path, set())
+        index.save(path, mtime_ns, subdirs, names - pending, pending)
+    index.prune(visited)
+
+
+def plan_renames(files):
+    # Phase two (a): work out every rename up front as (folder, old_name, new_name)
+    plan = []
+    for root, name in files:
+        path = Path(name)
+        new_name = clean_filename(path.stem).strip() + path.suffix
+        if new_name != name:
+            plan.append((root, name, new_name))
+    return plan
+
+
+def find_conflicts(plan, files):
+    # Split the plan into steps that are safe to run (in any order, in parallel)
+    # and steps that would overwrite something. One pass builds a hash index
+    # keyed by target path, so this is O(n) in the number of files.
+    key = os.path.normcase
+    sources = {key(os.path.join(root, old)) for root, old, _ in plan}
+    existing = {key(os.path.join(root, name)) for root, name in files}
+    targets = {}
+    for step in plan:
+        targets.setdefault(key(os.path.join(step[0], step[2])), []).append(step)
+
+    safe = []
+    conflicts = []
+    for step in plan:
+        root, old, new = step
+        target = key(os.path.join(root, new))
+        if len(targets[target]) > 1:
+            others = ", ".join(other[1] for other in targets[target] if other is not step)
+            conflicts.append(Conflict(root, old, new, f"same new name as {others}"))
+        elif target in sources:
+            conflicts.append(Conflict(root, old, new, "new name is another file that is also being renamed"))
+        elif target in existing:
+            conflicts.append(Conflict(root, old, new, "a file with the new name already exists"))
+        else:
+            safe.append(step)
+    return safe, conflicts
+
+
+class RenameJournal:
+    # Append-only JSONL record of one run: a "begin" line, one "plan" line per
+    # step, then "done"/"failed"/"undone" lines as steps are applied or rolled
+    # back, "rolled_back" once a rollback pass finishes, and "end" once a pass
+    # finishes. Each line is flushed as it is
+    # written, so after a crash the file says exactly which renames happened.
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, event, **fields):
+        self._file.write(json.dumps({"event": event, **fields}, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def begin(self, directory, plan):
+        self.write("begin", directory=os.path.abspath(directory), steps=len(plan), time=time.time())
+        for i, (root, old, new) in enumerate(plan):
+            self.write("plan", step=i, root=root, old=old, new=new)
+
+    def close(self):
+        self.write("end", time=time.time())
+        os.fsync(self._file.fileno())
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def new_journal_path(directory):
+    return os.path.join(directory, STATE_DIR, time.strftime("journal-%Y%m%d-%H%M%S.jsonl"))
+
+
+def latest_journal(directory):
+    state = os.path.join(directory, STATE_DIR)
+    try:
+        names = sorted(name for name in os.listdir(state) if name.startswith("journal-"))
+    except FileNotFoundError:
+        return None
+    return os.path.join(state, names[-1]) if names else None
+
+
+def load_journal(path):
+    # Returns (directory, plan, status) where status maps step -> last event
+    directory = None
+    plan = []
+    status = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A crash can leave a torn last line
+                continue
+            event = record["event"]
+            if event == "begin":
+                # Only the last run in the file counts
+                directory = record["directory"]
+                plan = []
+                status = {}
+            elif event == "plan":
+                plan.append((record["root"], record["old"], record["new"]))
+            elif event in ("done", "failed", "undone"):
+                status[record["step"]] = event
+            elif event == "rolled_back":
+                # The run was cancelled: nothing is left to resume, only steps
+                # whose restore failed are still "done"
+                for i in range(len(plan)):
+                    if status.get(i) != "done":
+                        status[i] = "undone"
+    return directory, plan, status
+
+
+def pending_steps(path):
+    # Steps of a journal that have not been applied yet; a rolled-back run has
+    # none, its renames must not come back on resume
+    _, plan, status = load_journal(path)
+    return [i for i in range(len(plan)) if status.get(i) not in ("done", "undone")]
+
+
+def _rename(root, old_name, new_name):
+    old_path = os.path.join(root, old_name)
+    new_path = os.path.join(root, new_name)
+    if not os.path.lexists(old_path) and os.path.lexists(new_path):
+        # Already renamed by an earlier, interrupted run
+        return old_name, new_name
+    # os.rename silently replaces an existing file on POSIX; never do that
+    if os.path.lexists(new_path):
+        raise FileExistsError(f"{new_path} already exists")
+    os.rename(old_path, new_path)
+    return old_name, new_name
+
+
+def apply_plan(plan, workers=RENAME_WORKERS, progress=None, journal=None, steps=None):
+    # Phase two (b): apply the plan on a bounded thread pool. `steps` limits the
+    # run to those plan indexes (used to resume). Each finished step is written
+    # to the journal from this thread. Returns ((old, new) pairs in plan order,
+    # [(step, error)] for renames that failed).
+    steps = range(len(plan)) if steps is None else steps
+    renamed = {}
+    failed = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_rename, *plan[i]): i for i in steps}
+        for done, future in enumerate(as_completed(futures), 1):
+            i = futures[future]
+            try:
+                renamed[i] = future.result()
+            except OSError as e:
+                failed.append((i, str(e)))
+                if journal:
+                    journal.write("failed", step=i, error=str(e))
+            else:
+                if journal:
+                    journal.write("done", step=i)
+            if progress:
+                progress("rename", done, len(futures))
+    return [renamed[i] for i in sorted(renamed)], sorted(failed)
+
+
+def resume_journal(path, workers=RENAME_WORKERS, progress=None):
+    # Finish an interrupted run from its journal, without rescanning the library
+    _, plan, _ = load_journal(path)
+    with RenameJournal(path) as journal:
+        return apply_plan(plan, workers, progress, journal, steps=pending_steps(path))
+
+
+def rollback_journal(path, progress=None):
+    # Undo every applied step of a journal, newest first
+    _, plan, status = load_journal(path)
+    done_steps = sorted((i for i, event in status.items() if event == "done"), reverse=True)
+    restored = []
+    failed = []
+    with RenameJournal(path) as journal:
+        for count, i in enumerate(done_steps, 1):
+            root, old, new = plan[i]
+            try:
+                _rename(root, new, old)
+            except OSError as e:
+                failed.append((i, str(e)))
+            else:
+                journal.write("undone", step=i)
+                restored.append((new, old))
+            if progress:
+                progress("rollback", count, len(done_steps))
+        journal.write("rolled_back")
+    return restored, failed
+
+
+def rename_files_in_directory(directory, progress=None, dry_run=False, journal_path=None, incremental=False):
+    # dry_run returns the plan in `renamed` without touching any file.
+    # incremental skips folders that have not changed since the last
+    # incremental run (see ScanIndex).
+    # Journal plan roots must not depend on the working directory: resume and
+    # rollback may run from another one, e.g. after restarting the app
+    directory = os.path.abspath(directory)
+    if not incremental:
+        files = scan_tree(directory, progress=progress)
+        return _clean(directory, files, files, progress, dry_run, journal_path)[0]
+    with ScanIndex(directory, read_only=dry_run) as index:
+        candidates, listings, visited = scan_changed(directory, index, progress=progress)
+        existing = [(path, name) for path, (_, _, names) in listings.items() for name in names]
+        result, plan = _clean(directory, candidates, existing, progress, dry_run, journal_path)
+        if not dry_run:
+            failed_steps = {step for step, _ in result.failed}
+            applied = [step for i, step in enumerate(plan) if i not in failed_steps]
+            held_back = [(c.root, c.old_name) for c in result.conflicts]
+            held_back += [(plan[i][0], plan[i][1]) for i in failed_steps]
+            update_index(index, listings, visited, applied, held_back)
+    return result
+
+
+def _clean(directory, candidates, existing, progress, dry_run, journal_path):
+    plan, conflicts = find_conflicts(plan_renames(candidates), existing)
+    if dry_run or not plan:
+        result = CleanResult([(old, new) for _, old, new in plan], conflicts, [])
+    else:
+        with RenameJournal(journal_path or new_journal_path(directory)) as journal:
+            journal.begin(directory, plan)
+            for conflict in conflicts:
+                journal.write("conflict", root=conflict.root, old=conflict.old_name,
+                              new=conflict.new_name, reason=conflict.reason)
+            renamed, failed = apply_plan(plan, progress=progress, journal=journal)
+        result = CleanResult(renamed, conflicts, failed)
+    return result, plan
@@ -0,0 +1,193 @@
+# One command line for the batch side of every tool, without Streamlit:
+#
+#   python cli.py titles    books.txt lists/ [-o out/] [--rules rules.json] [--stats]
+#   python cli.py clean     ~/Books [--dry-run] [--incremental]
+#   python cli.py storyboard song.txt lyrics/ [--mood Dreamy] [--length detailed] [--seed 7]
+#   python cli.py toto      [--backend static|playwright|selenium] [--snapshots dir/] [-o draws.csv]
+#
+# Inputs can be files or directories (searched recursively for .txt files).
+# Each subcommand imports its own modules when it runs, so e.g. title
+# extraction never pays for pandas, numpy or a browser driver.
+import argparse
+import os
+import sys
+import time
+
+# Suffixes of the files written next to (or for) each input; directory scans
+# skip them so a second run doesn't process its own output
+TITLES_SUFFIX = ".titles.txt"
+STORYBOARD_SUFFIX = ".storyboard"
+OUTPUT_SUFFIXES = (TITLES_SUFFIX, STORYBOARD_SUFFIX + ".txt")
+
+# --length accepts the first word of a DESCRIPTION_LENGTHS label
+LENGTH_NAMES = ("concise", "standard", "detailed", "elaborate")
+
+
+def iter_inputs(paths, extensions=(".txt",)):
+    # Files as given, directories walked in name order for matching files
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith(extensions) and not name.endswith(OUTPUT_SUFFIXES):
+                    yield os.path.join(root, name)
+
+
+def output_path(source, output_dir, suffix):
+    # books.txt -> books.titles.txt, beside the input unless output_dir is set
+    stem = os.path.splitext(os.path.basename(source))[0]
+    return os.path.join(output_dir or os.path.dirname(source), stem + suffix)
+
+
+def report(message):
+    print(message, file=sys.stderr)
+
+
+def run_titles(args):
+    from title_extractor import TitleParser, iter_titles_parallel, load_rules, print_stats, write_numbered
+
+    parser = TitleParser(load_rules(args.rules), profile=args.stats)
+    for source in iter_inputs(args.inputs):
+        start = time.perf_counter()
+        titles = iter_titles_parallel(source, workers=args.workers, parser=parser)
+        target = output_path(source, args.output_dir, TITLES_SUFFIX)
+        with open(target, "w", encoding="utf-8", newline="\n") as out:
+            count = write_numbered(titles, out)
+        report(f"{source}: {count} titles -> {target} ({time.perf_counter() - start:.2f} s)")
+    if args.stats:
+        # Totals over every input
+        print_stats(parser)
+
+
+def run_clean(args):
+    from book_cleaner import rename_files_in_directory
+
+    failures = 0
+    for directory in args.directories:
+        if not os.path.isdir(directory):
+            report(f"{directory}: not a directory, skipped")
+            failures += 1
+            continue
+        result = rename_files_in_directory(directory, dry_run=args.dry_run, incremental=args.incremental)
+        for old, new in result.renamed:
+            print(f"{old} -> {new}")
+        for conflict in result.conflicts:
+            report(f"skipped {conflict.old_name} -> {conflict.new_name}: {conflict.reason}")
+        for step, error in result.failed:
+            report(f"step {step} failed: {error}")
+        verb = "would rename" if args.dry_run else "renamed"
+        report(f"{directory}: {verb} {len(result.renamed)}, {len(result.conflicts)} conflicts, "
+               f"{len(result.failed)} failed")
+        failures += len(result.failed)
+    return 1 if failures else 0
+
+
+def run_storyboard(args):
+    import csv
+
+    from storyboard_engine import (
+        DESCRIPTION_LENGTHS, MOOD_PRESETS, SCENE_CACHE_PATH, SceneCache, generate_storyboard, storyboard_text,
+    )
+
+    if args.mood not in MOOD_PRESETS:
+        report(f"unknown mood {args.mood!r}, expected one of: {', '.join(MOOD_PRESETS)}")
+        return 2
+    length = next(label for label in DESCRIPTION_LENGTHS if label.lower().startswith(args.length))
+    with SceneCache(path=args.cache or SCENE_CACHE_PATH) as cache:
+        for source in iter_inputs(args.inputs):
+            with open(source, encoding="utf-8") as f:
+                scenes = generate_storyboard(f.read(), args.mood, length, seed=args.seed, cache=cache)
+            target = output_path(source, args.output_dir, f"{STORYBOARD_SUFFIX}.{args.format}")
+            with open(target, "w", encoding="utf-8", newline="") as out:
+                if args.format == "csv":
+                    writer = csv.DictWriter(out, ["Lyric", "Scene Description"], lineterminator="\n")
+                    writer.writeheader()
+                    writer.writerows(scenes)
+                else:
+                    out.write(storyboard_text(scenes))
+            report(f"{source}: {len(scenes)} scenes -> {target}")
+        stats = cache.stats()
+        report(f"scene cache: {stats['hits']} hits, {stats['misses']} misses")
+
+
+def run_toto(args):
+    if args.snapshots:
+        from toto_html import parse_snapshot_dir
+
+        df = parse_snapshot_dir(args.snapshots, args.workers)
+    elif args.backend == "static":
+        from toto_html import fetch_results
+
+        df = fetch_results()
+    elif args.backend == "playwright":
+        from toto_history import MAX_CONCURRENT_PAGES, scrape_toto_history
+
+        df = scrape_toto_history(args.from_draw, args.to_draw, args.concurrency or MAX_CONCURRENT_PAGES)
+    else:
+        from toto_scraper import scrape_toto_results
+
+        df = scrape_toto_results(max_draws=None)
+
+    if args.store:
+        from toto_store import DrawStore
+
+        with DrawStore(args.store) as store:
+            report(f"{store.append(df)} new draws stored in {args.store}")
+    if args.output:
+        df.to_csv(args.output, index=False)
+        report(f"{len(df)} draws saved to {args.output}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Run the book, storyboard and TOTO tools as batch jobs.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    titles = commands.add_parser("titles", help="extract book titles from lists of book lines")
+    titles.add_argument("inputs", nargs="+", help=".txt files or directories of them")
+    titles.add_argument("-o", "--output-dir", help=f"where to write <name>{TITLES_SUFFIX} (default: beside each input)")
+    titles.add_argument("-w", "--workers", type=int, default=None,
+                        help="worker processes (default: CPU count, 1 disables the pool)")
+    titles.add_argument("--rules", help="JSON rule table to use instead of the built-in rules")
+    titles.add_argument("--stats", action="store_true", help="print per-rule hit counts and timings to stderr")
+    titles.set_defaults(run=run_titles)
+
+    clean = commands.add_parser("clean", help="strip ISBNs, hashes and archive tags from book file names")
+    clean.add_argument("directories", nargs="+")
+    clean.add_argument("--dry-run", action="store_true", help="only print what would be renamed")
+    clean.add_argument("--incremental", action="store_true", help="skip folders unchanged since the last run")
+    clean.set_defaults(run=run_clean)
+
+    storyboard = commands.add_parser("storyboard", help="turn lyric sheets into storyboards, one scene per line")
+    storyboard.add_argument("inputs", nargs="+", help=".txt lyric sheets or directories of them")
+    storyboard.add_argument("-o", "--output-dir", help="where to write the storyboards (default: beside each input)")
+    storyboard.add_argument("--mood", default="Random")
+    storyboard.add_argument("--length", choices=LENGTH_NAMES, default="standard")
+    storyboard.add_argument("--seed", type=int, default=None, help="same seed, same storyboard (and cacheable)")
+    storyboard.add_argument("--format", choices=("csv", "txt"), default="csv")
+    storyboard.add_argument("--cache", help="SQLite scene cache (default: $STORYBOARD_CACHE, else memory only)")
+    storyboard.set_defaults(run=run_storyboard)
+
+    toto = commands.add_parser("toto", help="scrape TOTO draws to a CSV and/or the draw store")
+    toto.add_argument("--backend", choices=("static", "playwright", "selenium"), default="static")
+    toto.add_argument("--snapshots", help="parse a directory of saved results pages instead of scraping")
+    toto.add_argument("--from-draw", type=int, default=1, help="first draw to fetch (playwright)")
+    toto.add_argument("--to-draw", type=int, default=None, help="last draw to fetch (playwright, default: latest)")
+    toto.add_argument("--concurrency", type=int, default=None,
+                      help="browser pages at once (playwright, default: 8)")
+    toto.add_argument("-w", "--workers", type=int, default=None, help="worker processes for --snapshots")
+    toto.add_argument("-o", "--output", default="toto_scraped_results.csv", help="CSV to write ('' to skip)")
+    toto.add_argument("--store", help="also append the draws to this SQLite draw store")
+    toto.set_defaults(run=run_toto)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.run(args) or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+import gzip
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+
+# Encoded exports kept in memory, most recently used last
+MAX_CACHED_EXPORTS = 16
+
+# label -> (file extension, MIME type)
+FRAME_FORMATS = {
+    "CSV": (".csv", "text/csv"),
+    "CSV (gzip)": (".csv.gz", "application/gzip"),
+    "Parquet": (".parquet", "application/vnd.apache.parquet"),
+    "Arrow IPC": (".arrow", "application/vnd.apache.arrow.file"),
+}
+
+_cache = OrderedDict()
+# Download callables run on their own thread, outside the script run
+_lock = threading.Lock()
+
+
+def cached_export(fingerprint, fmt, make_bytes):
+    # Memoise the bytes of one export. `fingerprint` identifies the dataset
+    # version, so the same data is only ever serialised once per format.
+    key = (fingerprint, fmt)
+    with _lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    data = make_bytes()
+    with _lock:
+        _cache[key] = data
+        while len(_cache) > MAX_CACHED_EXPORTS:
+            _cache.popitem(last=False)
+    return data
+
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
+
+
+def frame_fingerprint(df):
+    # Cheap, vectorised content hash for frames without a known version
+    import pandas as pd
+
+    row_hash = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    digest = hashlib.sha1(row_hash.tobytes())
+    digest.update(repr((list(df.columns), df.shape)).encode())
+    return digest.hexdigest()
+
+
+def text_fingerprint(*parts):
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def encode_frame(df, fmt):
+    if fmt == "CSV":
+        return df.to_csv(index=False).encode("utf-8")
+    if fmt == "CSV (gzip)":
+        return gzip.compress(df.to_csv(index=False).encode("utf-8"), compresslevel=6)
+    buffer = io.BytesIO()
+    if fmt == "Parquet":
+        df.to_parquet(buffer, index=False)
+    elif fmt == "Arrow IPC":
+        df.to_feather(buffer)
+    else:
+        raise ValueError(f"Unknown export format {fmt!r}, expected one of {list(FRAME_FORMATS)}")
+    return buffer.getvalue()
+
+
+def frame_export(df, fmt, fingerprint=None):
+    # Pass a known dataset version as `fingerprint` to skip hashing the frame
+    if fingerprint is None:
+        fingerprint = frame_fingerprint(df)
+    return cached_export(fingerprint, fmt, lambda: encode_frame(df, fmt))
+
+
+def frame_download_buttons(container, df, file_stem, fingerprint=None, formats=tuple(FRAME_FORMATS),
+                           label="📥 Download"):
+    # One download button per format, laid out in columns of `container`
+    # (st, st.sidebar, a column...). Nothing is serialised until a button is
+    # clicked; Streamlit calls the data callable then, on its own thread.
+    for column, fmt in zip(container.columns(len(formats)), formats):
+        extension, mime = FRAME_FORMATS[fmt]
+        column.download_button(
+            label=f"{label} {fmt}",
+            data=lambda fmt=fmt: frame_export(df, fmt, fingerprint),
+            file_name=file_stem + extension,
+            mime=mime,
+            key=f"download_{file_stem}_{fmt}",
+        )
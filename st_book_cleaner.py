@@ -1,46 +1,84 @@
 import streamlit as st
 import os
-import re
-from pathlib import Path
-
-def clean_filename(filename):
-    # Remove 13-digit numbers (ISBNs)
-    filename = re.sub(r'\b978\d{10}\b', '', filename)
-    # Remove 32-character ASCII hex strings
-    filename = re.sub(r'\b[a-fA-F0-9]{32}\b', '', filename)
-    # Remove "Anna’s Archive" (both straight and curly apostrophes)
-    filename = re.sub(r"Anna[’']s Archive", '', filename, flags=re.IGNORECASE)
-    # Remove redundant separators
-    filename = re.sub(r'\s*--\s*', ' -- ', filename)  # Normalize
-    filename = re.sub(r'( -- ){2,}', ' -- ', filename)  # Remove extras
-    return filename.strip().strip('-').strip()
-
-def rename_files_in_directory(directory):
-    renamed_files = []
-    for root, _, files in os.walk(directory):
-        for file in files:
-            old_path = os.path.join(root, file)
-            if not os.path.isfile(old_path):
-                continue
-            new_name = clean_filename(Path(file).stem).strip() + Path(file).suffix
-            new_path = os.path.join(root, new_name)
-            if old_path != new_path:
-                os.rename(old_path, new_path)
-                renamed_files.append((file, new_name))
-    return renamed_files
+
+from book_cleaner import latest_journal, pending_steps, rename_files_in_directory, resume_journal, rollback_journal
 
 st.title("📚 Book Title Cleaner")
 
 folder = st.text_input("Enter the path to the directory to scan (including subfolders):")
+dry_run = st.checkbox("Dry run (only show what would be renamed)")
+incremental = st.checkbox("Skip folders unchanged since the last run", value=True)
+
+
+def progress_reporter():
+    status = st.empty()
+    progress_bar = st.progress(0)
+    last_shown = {}
+    labels = {"scan": "Scanning folders", "rename": "Renaming files", "rollback": "Restoring names"}
+
+    def show_progress(phase, done, total):
+        # Only push an update to the browser when the percentage changes
+        percent = int(100 * done / total) if total else 100
+        if last_shown.get(phase) == percent:
+            return
+        last_shown[phase] = percent
+        status.text(f"{labels[phase]}: {done:,} / {total:,}")
+        progress_bar.progress(percent)
+
+    def clear():
+        status.empty()
+        progress_bar.empty()
+
+    return show_progress, clear
+
+
+def show_failures(failed):
+    if failed:
+        st.error(f"{len(failed)} renames failed:")
+        for step, error in failed:
+            st.write(f"❌ step {step}: {error}")
+
 
 if st.button("Clean Book Titles"):
     if os.path.isdir(folder):
-        renamed = rename_files_in_directory(folder)
-        if renamed:
-            st.success(f"Renamed {len(renamed)} files:")
-            for old, new in renamed:
+        show_progress, clear = progress_reporter()
+        result = rename_files_in_directory(folder, progress=show_progress, dry_run=dry_run, incremental=incremental)
+        clear()
+        if result.renamed:
+            if dry_run:
+                st.info(f"Would rename {len(result.renamed)} files:")
+            else:
+                st.success(f"Renamed {len(result.renamed)} files:")
+            for old, new in result.renamed:
                 st.write(f"✅ `{old}` → `{new}`")
         else:
             st.info("No files needed renaming.")
+        if result.conflicts:
+            st.warning(f"Skipped {len(result.conflicts)} files whose new name would collide:")
+            for conflict in result.conflicts:
+                st.write(f"⚠️ `{conflict.old_name}` → `{conflict.new_name}`: {conflict.reason}")
+        show_failures(result.failed)
     else:
         st.error("Please enter a valid directory path.")
+
+# Recovery for the most recent run in this folder
+journal = latest_journal(folder) if os.path.isdir(folder) else None
+if journal:
+    with st.expander("Last run journal"):
+        st.write(f"`{journal}`")
+        remaining = pending_steps(journal)
+        if remaining:
+            st.warning(f"{len(remaining)} planned renames were not applied.")
+        col1, col2 = st.columns(2)
+        if col1.button("Resume last run", disabled=not remaining):
+            show_progress, clear = progress_reporter()
+            renamed, failed = resume_journal(journal, progress=show_progress)
+            clear()
+            st.success(f"Renamed {len(renamed)} more files.")
+            show_failures(failed)
+        if col2.button("Roll back last run"):
+            show_progress, clear = progress_reporter()
+            restored, failed = rollback_journal(journal, progress=show_progress)
+            clear()
+            st.success(f"Restored {len(restored)} original names.")
+            show_failures(failed)
@@ -1,35 +1,80 @@
 import streamlit as st
 import os
-import re
-
-def extract_title(line: str) -> str:
-    # Case 1: contains '--' or ' - [^-]+ - ' for typical patterns
-    if '--' in line or re.search(r' - [^-]+ - ', line):
-        title = re.split(r"--| - [^-]+ - ", line)[0].strip()
-        print ("title 1:", title[0])
-    else:
-        # Case 2: author - title - extra
-        # Split only on the FIRST ' - ', keep the rest intact
-        parts = line.split(" - ", 1)
-        title = parts[1].strip() if len(parts) > 1 else line.strip()
-        print ("parts [0] :", parts[0])
-        print ("title 2", title[0])
-
-    return title
+import tempfile
+import weakref
+
+from title_extractor import TitleParser, iter_titles_parallel, write_numbered
+
+# Only the first few titles are rendered on the page; the download has them all
+PREVIEW_LINES = 1000
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class TitlesFile:
+    # The numbered titles of one upload on disk, plus what the page shows.
+    # The file is deleted when this object goes away: when a new upload
+    # replaces it, when the session (and its session_state) is dropped, or at
+    # interpreter exit.
+    def __init__(self, file_id):
+        self.file_id = file_id
+        with tempfile.NamedTemporaryFile(prefix="book_titles_", suffix=".txt", delete=False) as tmp:
+            self.path = tmp.name
+        self.preview = []
+        self.total = 0
+        self.stats = []
+        weakref.finalize(self, _remove, self.path)
+
+    def read(self):
+        with open(self.path, "rb") as f:
+            return f.read()
+
+
+def extract_titles(uploaded_file):
+    result = TitlesFile(uploaded_file.file_id)
+    parser = TitleParser(profile=True)
+
+    def titles_with_preview():
+        # Stream titles straight into the output file, keeping a small preview
+        for title in iter_titles_parallel(uploaded_file, parser=parser):
+            if len(result.preview) < PREVIEW_LINES:
+                result.preview.append(title)
+            yield title
+
+    with open(result.path, "w", encoding="utf-8", newline="\n") as out:
+        result.total = write_numbered(titles_with_preview(), out)
+    result.stats = parser.stats()
+    return result
+
 
 st.title("Book Title Extractor")
 
 uploaded_file = st.file_uploader("Upload a .txt file with book lines", type=["txt"])
 if uploaded_file:
-    content = uploaded_file.read().decode("utf-8").splitlines()
-    
-    # Process each line individually
-    titles = [extract_title(line) for line in content if line.strip()]
+    # Each upload is parsed once; reruns reuse its file, which is never
+    # rewritten, so a download in progress always reads complete output
+    result = st.session_state.get("titles")
+    if result is None or result.file_id != uploaded_file.file_id:
+        result = st.session_state["titles"] = extract_titles(uploaded_file)
 
     st.subheader("Extracted Titles")
-    for idx, title in enumerate(titles, 1):
+    for idx, title in enumerate(result.preview, 1):
         st.write(f"{idx}. {title}")
+    if result.total > len(result.preview):
+        st.caption(
+            f"Showing the first {len(result.preview)} of {result.total} titles. Download the file for the full list."
+        )
+
+    # Prepare for download; the file is read only when the button is clicked
+    st.download_button(
+        "Download Titles as .txt", data=result.read, file_name="book_titles.txt", mime="text/plain",
+        on_click="ignore",
+    )
 
-    # Prepare for download
-    csv_ready = "\n".join([f"{idx}. {title}" for idx, title in enumerate(titles, 1)])
-    st.download_button("Download Titles as .txt", csv_ready, "book_titles.txt")
+    with st.expander("Rule statistics"):
+        st.table(result.stats)
@@ -0,0 +1,625 @@
+import hashlib
+import logging
+import math
+import os
+import sqlite3
+import threading
+from collections import OrderedDict, namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# UI refreshes per generated storyboard, however many lines it has
+PROGRESS_UPDATES = 20
+
+# Scenes kept by a SceneCache in memory and, when it has a file, on disk.
+# Set STORYBOARD_CACHE to a file path to keep the Streamlit app's cache on disk.
+SCENE_CACHE_SIZE = 10_000
+DISK_CACHE_SIZE = 200_000
+SCENE_CACHE_PATH = os.environ.get("STORYBOARD_CACHE")
+# SQLite host parameters per IN (...) query
+_KEYS_PER_QUERY = 500
+
+# Define visual elements categories
+VISUAL_ELEMENTS = {
+    "Scenic & Environmental Settings": [
+        "Misty forest at dawn",
+        "Sun-drenched valley",
+        "Neon-lit cityscape at night",
+        "Ocean waves crashing at sunset",
+        "Snow-covered mountain peak",
+        "Desert with golden dunes",
+        "Rainy alley with reflections",
+        "Twilight over a quiet lake",
+        "Abandoned warehouse with dust beams",
+        "Star-filled sky over rolling hills"
+    ],
+    "Mood & Atmosphere": [
+        "Dreamlike haze",
+        "Melancholic silence",
+        "Electric anticipation",
+        "Whimsical serenity",
+        "Tense and foreboding",
+        "Radiant joy",
+        "Somber and still",
+        "Ethereal glow",
+        "Cinematic melancholy",
+        "Pulsing with energy"
+    ],
+    "Character Descriptors": [
+        "Woman in flowing white dress",
+        "Mysterious figure in a hooded cloak",
+        "Child chasing butterflies",
+        "Man walking in slow motion",
+        "Girl spinning in a flower field",
+        "Astronaut floating weightlessly",
+        "Dancer under spotlight",
+        "Elder sitting by the fire",
+        "Lovers holding hands under rain",
+        "Warrior standing in ruins"
+    ],
+    "Visual Style & Techniques": [
+        "Black and white film grain",
+        "Watercolor painting aesthetic",
+        "VHS retro distortion",
+        "Cinematic lens flare",
+        "Slow-motion camera pan",
+        "Close-up with shallow depth of field",
+        "Time-lapse sunset",
+        "Glitch art overlays",
+        "Sepia-toned flashback",
+        "Surreal double exposure"
+    ],
+    "Nature & Elements": [
+        "Cherry blossoms falling",
+        "Leaves swirling in wind",
+        "Thunderstorm in distance",
+        "Reflections in still water",
+        "Fog creeping over hills",
+        "Fireflies glowing at dusk",
+        "Raindrops on glass",
+        "Lightning flashing across sky",
+        "Ember sparks rising",
+        "Ice cracking underfoot"
+    ]
+}
+
+# List of descriptive verbs to enhance scene descriptions
+DESCRIPTIVE_VERBS = [
+    "unfolds", "reveals", "emerges", "transforms", "transitions",
+    "drifts", "glides", "cascades", "illuminates", "radiates",
+    "echoes", "resonates", "shimmers", "fades", "dissolves",
+    "intensifies", "envelops", "surrounds", "embraces", "captivates"
+]
+
+# List of connecting phrases to join elements together
+CONNECTING_PHRASES = [
+    "as", "while", "where", "beneath", "above",
+    "amidst", "alongside", "through", "within", "beyond",
+    "against", "between", "throughout", "under", "over"
+]
+
+# Description lengths with corresponding word count ranges
+DESCRIPTION_LENGTHS = {
+    "Concise (30-50 words)": (30, 50),
+    "Standard (50-80 words)": (50, 80),
+    "Detailed (80-120 words)": (80, 120),
+    "Elaborate (120-150 words)": (120, 150)
+}
+
+# Presets for different moods and their corresponding element probabilities
+MOOD_PRESETS = {
+    "Uplifting": {
+        "Scenic & Environmental Settings": [1, 2, 4, 8, 9],
+        "Mood & Atmosphere": [3, 4, 6, 8, 10],
+        "Character Descriptors": [1, 3, 5, 7, 9],
+        "Visual Style & Techniques": [3, 4, 5, 7, 10],
+        "Nature & Elements": [1, 2, 4, 6, 8]
+    },
+    "Melancholic": {
+        "Scenic & Environmental Settings": [0, 6, 7, 8, 9],
+        "Mood & Atmosphere": [1, 2, 4, 7, 8],
+        "Character Descriptors": [0, 1, 7, 8, 9],
+        "Visual Style & Techniques": [0, 2, 5, 8, 9],
+        "Nature & Elements": [2, 4, 6, 7, 9]
+    },
+    "Energetic": {
+        "Scenic & Environmental Settings": [2, 3, 5, 6, 9],
+        "Mood & Atmosphere": [2, 3, 5, 9, 10],
+        "Character Descriptors": [2, 3, 4, 6, 9],
+        "Visual Style & Techniques": [3, 4, 6, 7, 8],
+        "Nature & Elements": [2, 3, 7, 8, 9]
+    },
+    "Dreamy": {
+        "Scenic & Environmental Settings": [0, 1, 3, 7, 9],
+        "Mood & Atmosphere": [0, 3, 4, 7, 8],
+        "Character Descriptors": [0, 2, 4, 5, 6],
+        "Visual Style & Techniques": [1, 4, 8, 9, 10],
+        "Nature & Elements": [0, 1, 4, 5, 6]
+    },
+    "Dramatic": {
+        "Scenic & Environmental Settings": [0, 2, 3, 4, 8],
+        "Mood & Atmosphere": [2, 4, 5, 8, 9],
+        "Character Descriptors": [1, 5, 6, 8, 9],
+        "Visual Style & Techniques": [0, 4, 5, 8, 9],
+        "Nature & Elements": [2, 3, 7, 8, 9]
+    },
+    "Random": None  # Will use random selection for all categories
+}
+
+# Descriptive adjectives to enhance scene descriptions based on mood
+MOOD_ADJECTIVES = {
+    "Uplifting": ["radiant", "vibrant", "joyful", "bright", "gleaming", "hopeful", "warm", "inspiring"],
+    "Melancholic": ["faded", "distant", "somber", "wistful", "weathered", "lonely", "haunting", "subdued"],
+    "Energetic": ["vivid", "dynamic", "pulsing", "electric", "powerful", "intense", "bold", "striking"],
+    "Dreamy": ["ethereal", "misty", "surreal", "hazy", "floating", "delicate", "soft", "enchanted"],
+    "Dramatic": ["stark", "towering", "fierce", "imposing", "stormy", "shadowed", "profound", "majestic"],
+    "Random": ["random", "varied", "eclectic", "diverse", "unexpected", "surprising", "unpredictable", "unpredictable"]
+
+}
+
+# Fill-in sentences. Each is (template, options for {0}, {1}, ...); only the
+# template a scene actually uses gets formatted.
+EMOTIONAL_INTERPRETATIONS = (
+    ("The visual metaphor reinforces the lyric's sentiment of {0}.",
+     (("longing", "hope", "transformation", "reflection", "connection"),)),
+    ("This imagery {0} the emotional undercurrent of the words.",
+     (("amplifies", "echoes", "contrasts with", "complements", "reinterprets"),)),
+    ("The scene {0} the {1} inherent in the lyric.",
+     (("evokes", "suggests", "highlights", "mirrors", "enhances"),
+      ("vulnerability", "strength", "ambiguity", "clarity", "tension"))),
+)
+
+TRANSITIONS = (
+    (" The frame could {0} to the next scene.",
+     (("slowly dissolve", "cut sharply", "fade gently", "transition smoothly"),)),
+    (" As the scene {0}, it leaves a {1} impression.",
+     (("fades", "lingers", "dissolves", "transitions"), ("poignant", "powerful", "subtle", "striking"))),
+    (" This moment {0} what comes next in the visual narrative.",
+     (("bridges", "connects", "contrasts with", "complements"),)),
+)
+
+# Appended, in random order and each at most once, until a scene is long enough
+ADDITIONAL_DETAILS = (
+    (" {0} plays a crucial role, creating a {1} visual rhythm.",
+     (("Light", "Shadow", "Color", "Texture", "Movement"), ("dynamic", "subtle", "striking", "nuanced"))),
+    (" The {0} emphasizes the {1} weight of the moment.",
+     (("composition", "framing", "perspective", "visual flow"), ("emotional", "thematic", "symbolic", "narrative"))),
+    (" {0} feels {1} in this interpretation.",
+     (("Time", "Space", "Perspective", "Scale"), ("distorted", "amplified", "intimate", "expansive"))),
+    (" The {0} {1} the central imagery.",
+     (("foreground", "background", "lighting", "color palette"), ("contrasts with", "complements", "enhances", "defines"))),
+)
+
+CATEGORIES = tuple(VISUAL_ELEMENTS)
+
+# Columns of the uniform draws behind one scene: one per category element,
+# then the adjective, connecting phrases and verbs, then a template and two
+# fillers for the interpretation and for the transition, then a sort key and
+# two fillers for each additional detail
+_ELEMENT = 0
+_ADJECTIVE = len(CATEGORIES)
+_CONNECT_1, _VERB_1, _VERB_2, _CONNECT_2 = range(_ADJECTIVE + 1, _ADJECTIVE + 5)
+_INTERPRETATION = _ADJECTIVE + 5
+_TRANSITION = _INTERPRETATION + 3
+_DETAIL_ORDER = _TRANSITION + 3
+_DETAIL_FILL = _DETAIL_ORDER + len(ADDITIONAL_DETAILS)
+DRAWS_PER_SCENE = _DETAIL_FILL + 2 * len(ADDITIONAL_DETAILS)
+
+# A selected custom element weighs as much as this many preset entries
+PREFERENCE_WEIGHT = 3
+
+# Per category: the candidate elements as an object array and the running
+# total of their weights, for np.searchsorted
+CompiledMood = namedtuple("CompiledMood", ["elements", "cumulative", "adjectives"])
+
+
+def resolve_preset(mood):
+    # A mood's preset indices as the element strings it picks from, one tuple
+    # per category (all of them for "Random"). A repeated element keeps its
+    # extra weight. An out-of-range index falls back to element 3, as it always
+    # has, but is only reported once here instead of on every scene.
+    preset = MOOD_PRESETS[mood]
+    elements = []
+    for category, options in VISUAL_ELEMENTS.items():
+        if preset is None or category not in preset:
+            elements.append(tuple(options))
+            continue
+        resolved = []
+        for index in preset[category]:
+            if index < len(options):
+                resolved.append(options[index])
+            else:
+                logger.warning("Invalid index %d for %s / %r, using element 3", index, mood, category)
+                resolved.append(options[3])
+        elements.append(tuple(resolved))
+    return tuple(elements)
+
+
+RESOLVED_PRESETS = {mood: resolve_preset(mood) for mood in MOOD_PRESETS}
+
+
+def _choices(options):
+    # 1-d object array, so a whole column of draws can index it at once
+    array = np.empty(len(options), dtype=object)
+    array[:] = list(options)
+    return array
+
+
+def preference_key(preferences):
+    # {category: [elements]} -> hashable, order-independent form; categories
+    # with nothing selected are left out
+    return tuple(sorted(
+        (category, tuple(sorted(selected))) for category, selected in (preferences or {}).items() if selected
+    ))
+
+
+def compile_mood(mood, preferences=None):
+    # One weighted sampling table per category: every preset entry weighs 1
+    # and every element in `preferences` ({category: [elements]}) adds
+    # PREFERENCE_WEIGHT, so a custom pick is favoured without shutting out
+    # the mood's own elements.
+    preferences = dict(preferences or {})
+    unknown = set(preferences) - set(VISUAL_ELEMENTS)
+    if unknown:
+        raise ValueError(f"Unknown element categories: {sorted(unknown)}")
+    elements, cumulative = [], []
+    for (category, options), candidates in zip(VISUAL_ELEMENTS.items(), RESOLVED_PRESETS[mood]):
+        selected = list(preferences.get(category, ()))
+        for element in selected:
+            if element not in options:
+                raise ValueError(f"{element!r} is not one of the {category!r} elements")
+        elements.append(_choices([*candidates, *selected]))
+        cumulative.append(np.cumsum([1.0] * len(candidates) + [float(PREFERENCE_WEIGHT)] * len(selected)))
+    return CompiledMood(tuple(elements), tuple(cumulative), tuple(MOOD_ADJECTIVES.get(mood, MOOD_ADJECTIVES["Random"])))
+
+
+@lru_cache(maxsize=64)
+def _compiled_mood(mood, key):
+    return compile_mood(mood, dict(key))
+
+
+def compiled_mood(mood, preferences=None):
+    # Built once per settings change, then shared by every batch
+    return _compiled_mood(mood, preference_key(preferences))
+
+
+def _weighted_pick(elements, cumulative, u):
+    # Inverse-CDF sampling: O(log n) per draw, vectorised over the batch
+    index = np.searchsorted(cumulative, u * cumulative[-1], side="right")
+    return elements[np.minimum(index, len(elements) - 1)]
+
+
+def _fill_words(templates, draws, columns):
+    # For each (template, options) entry, the words every row of `draws`
+    # would fill it with, drawn from `columns`: a list of tuples per template
+    words = []
+    for _, slots in templates:
+        picked = [
+            _choices(options)[(draws[:, column] * len(options)).astype(np.intp)].tolist()
+            for column, options in zip(columns, slots)
+        ]
+        words.append(list(zip(*picked)))
+    return words
+
+
+def fit_word_budget(parts, details, min_words, max_words):
+    # Join scene fragments into a description of min_words..max_words words.
+    # Short scenes take `details` (an iterable of fragments, consumed lazily)
+    # until they are long enough; long ones are cut to max_words and back to
+    # the last full stop. Every fragment's words are counted once, so this is
+    # linear in the output length. Fragments must not glue words across their
+    # boundaries (each ends with a space or starts with one where needed).
+    counts = [len(part.split()) for part in parts]
+    total = sum(counts)
+
+    if total < min_words:
+        parts = list(parts)
+        for detail in details:
+            if total >= min_words:
+                break
+            parts.append(detail)
+            total += len(detail.split())
+        return "".join(parts)
+
+    if total <= max_words:
+        return "".join(parts)
+
+    # Trim the scene if it's too long: keep the first max_words words
+    words = []
+    for part, count in zip(parts, counts):
+        if len(words) + count >= max_words:
+            words.extend(part.split()[:max_words - len(words)])
+            break
+        words.extend(part.split())
+    trimmed = " ".join(words)
+
+    # Make sure to end with a complete sentence
+    last_period_index = trimmed.rfind(".")
+    if last_period_index > 0:
+        return trimmed[:last_period_index + 1]
+    return trimmed + "."
+
+
+# Everything up to the interpretation sentence
+SCENE_TEMPLATE = (
+    "Scene inspired by \"{lyric}\": A {adjective} {setting} {connect_1} a {character} {verb_1} in a {atmosphere}. "
+    "The scene {verb_2} with {style}, {connect_2} {nature}. "
+)
+
+
+def scene_draws(keys):
+    # One row of DRAWS_PER_SCENE uniforms in [0, 1) per scene key (see
+    # SceneCache.key), read from the key's own SHAKE-128 stream, so a scene
+    # depends only on its lyric and settings, never on where the line sits in
+    # the sheet. About 7x cheaper per line than seeding a numpy generator.
+    stream = b"".join(hashlib.shake_128(key.encode()).digest(8 * DRAWS_PER_SCENE) for key in keys)
+    bits = np.frombuffer(stream, dtype="<u8").reshape(len(keys), DRAWS_PER_SCENE)
+    return (bits >> np.uint64(11)) * (1.0 / (1 << 53))
+
+
+def generate_scenes(lyrics, mood, description_length, draws, preferences=None):
+    # Scene descriptions for a batch of lyric lines. `draws` holds the
+    # randomness, one row of DRAWS_PER_SCENE uniforms per line (scene_draws or
+    # rng.random), and every word is picked for the whole batch at once; each
+    # scene then only formats the templates it picked.
+    # `preferences` ({category: [elements]}) weights the element choices.
+    compiled = compiled_mood(mood, preferences)
+    min_words, max_words = DESCRIPTION_LENGTHS[description_length]
+    element_columns = [
+        _weighted_pick(elements, cumulative, draws[:, _ELEMENT + c])
+        for c, (elements, cumulative) in enumerate(zip(compiled.elements, compiled.cumulative))
+    ]
+    fixed = [
+        (_ADJECTIVE, compiled.adjectives),
+        (_CONNECT_1, CONNECTING_PHRASES), (_VERB_1, DESCRIPTIVE_VERBS),
+        (_VERB_2, DESCRIPTIVE_VERBS), (_CONNECT_2, CONNECTING_PHRASES),
+        (_INTERPRETATION, range(len(EMOTIONAL_INTERPRETATIONS))), (_TRANSITION, range(len(TRANSITIONS))),
+    ]
+    picked = np.column_stack(element_columns + [
+        _choices(options)[(draws[:, column] * len(options)).astype(np.intp)] for column, options in fixed
+    ]).tolist()
+    interpretation_words = _fill_words(EMOTIONAL_INTERPRETATIONS, draws, range(_INTERPRETATION + 1, _TRANSITION))
+    transition_words = _fill_words(TRANSITIONS, draws, range(_TRANSITION + 1, _DETAIL_ORDER))
+    detail_words = [
+        _fill_words([detail], draws, range(_DETAIL_FILL + 2 * d, _DETAIL_FILL + 2 * d + 2))[0]
+        for d, detail in enumerate(ADDITIONAL_DETAILS)
+    ]
+    detail_order = np.argsort(draws[:, _DETAIL_ORDER:_DETAIL_FILL], axis=1).tolist()
+
+    scenes = []
+    for r, (lyric, choice, order) in enumerate(zip(lyrics, picked, detail_order)):
+        # Clean the lyric text
+        lyric = lyric.strip()
+        if not lyric:
+            scenes.append("Please enter a lyric to generate a scene.")
+            continue
+        (setting, atmosphere, character, style, nature, adjective,
+         connect_1, verb_1, verb_2, connect_2, interpretation, transition) = choice
+        parts = [
+            SCENE_TEMPLATE.format(
+                lyric=lyric, adjective=adjective, setting=setting, connect_1=connect_1, character=character,
+                verb_1=verb_1, atmosphere=atmosphere, verb_2=verb_2, style=style, connect_2=connect_2, nature=nature,
+            ),
+            EMOTIONAL_INTERPRETATIONS[interpretation][0].format(*interpretation_words[interpretation][r]),
+            TRANSITIONS[transition][0].format(*transition_words[transition][r]),
+        ]
+        # Details are formatted lazily, only as many as the padding needs
+        details = (ADDITIONAL_DETAILS[d][0].format(*detail_words[d][r]) for d in order)
+        scenes.append(fit_word_budget(parts, details, min_words, max_words))
+    return scenes
+
+
+def generate_scene_from_lyric(lyric, mood, description_length, seed=None, preferences=None):
+    # One scene; the same seed always gives the same description, the same one
+    # generate_storyboard gives that line
+    if seed is None:
+        draws = np.random.default_rng().random((1, DRAWS_PER_SCENE))
+    else:
+        draws = scene_draws([SceneCache.key(lyric, mood, description_length, seed, preferences)])
+    return generate_scenes([lyric], mood, description_length, draws, preferences)[0]
+
+
+def split_lyrics(lyrics):
+    # One scene per non-blank line
+    return [line for line in lyrics.split('\n') if line.strip()]
+
+
+def normalise_lyric(lyric):
+    return " ".join(lyric.split())
+
+
+class SceneCache:
+    # Content-addressed store of generated scenes, keyed by the normalised
+    # lyric, mood, description length and seed. Least recently used scenes are
+    # evicted past `max_entries` in memory and, with a `path`, past
+    # `max_disk_entries` in a SQLite file that outlives the process. One cache
+    # can be shared by every Streamlit session, hence the lock.
+    def __init__(self, max_entries=SCENE_CACHE_SIZE, path=None, max_disk_entries=DISK_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.path = path
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS scenes (key TEXT PRIMARY KEY, scene TEXT NOT NULL, used INTEGER NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS scenes_used ON scenes (used)")
+            # Logical clock for LRU order on disk
+            self._clock = self._db.execute("SELECT COALESCE(MAX(used), 0) FROM scenes").fetchone()[0]
+
+    @staticmethod
+    def key(lyric, mood, description_length, seed, preferences=None):
+        parts = (normalise_lyric(lyric), mood, description_length, str(seed), repr(preference_key(preferences)))
+        return hashlib.sha1("\0".join(parts).encode("utf-8")).hexdigest()
+
+    def _remember(self, key, scene):
+        self._memory[key] = scene
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            # With a file behind it, the scene is still cached on disk
+            if self._db is None:
+                self.evictions += 1
+
+    def _load(self, keys):
+        found = {}
+        for start in range(0, len(keys), _KEYS_PER_QUERY):
+            chunk = keys[start:start + _KEYS_PER_QUERY]
+            marks = ", ".join("?" * len(chunk))
+            found.update(self._db.execute(f"SELECT key, scene FROM scenes WHERE key IN ({marks})", chunk))
+            self._clock += 1
+            with self._db:
+                self._db.execute(f"UPDATE scenes SET used = ? WHERE key IN ({marks})", [self._clock, *chunk])
+        return found
+
+    def get_many(self, keys):
+        # Scene or None for every key, in order
+        with self._lock:
+            scenes = []
+            for key in keys:
+                scene = self._memory.get(key)
+                if scene is not None:
+                    self._memory.move_to_end(key)
+                scenes.append(scene)
+            if self._db is not None:
+                missing = [key for key, scene in zip(keys, scenes) if scene is None]
+                from_disk = self._load(missing) if missing else {}
+                for i, key in enumerate(keys):
+                    if scenes[i] is None and key in from_disk:
+                        scenes[i] = from_disk[key]
+                        self._remember(key, scenes[i])
+            hits = sum(scene is not None for scene in scenes)
+            self.hits += hits
+            self.misses += len(scenes) - hits
+            return scenes
+
+    def put_many(self, items):
+        # items: (key, scene) pairs
+        items = list(items)
+        with self._lock:
+            for key, scene in items:
+                self._remember(key, scene)
+            if self._db is None or not items:
+                return
+            self._clock += 1
+            with self._db:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO scenes VALUES (?, ?, ?)", [(key, scene, self._clock) for key, scene in items]
+                )
+                over = self._db.execute("SELECT COUNT(*) FROM scenes").fetchone()[0] - self.max_disk_entries
+                if over > 0:
+                    self._db.execute(
+                        "DELETE FROM scenes WHERE key IN (SELECT key FROM scenes ORDER BY used LIMIT ?)", (over,)
+                    )
+                    self.evictions += over
+
+    def clear(self):
+        # Explicit eviction of everything, in memory and on disk
+        with self._lock:
+            self.evictions += self._count()
+            self._memory.clear()
+            if self._db is not None:
+                with self._db:
+                    self._db.execute("DELETE FROM scenes")
+
+    def _count(self):
+        # Caller holds self._lock
+        if self._db is not None:
+            return self._db.execute("SELECT COUNT(*) FROM scenes").fetchone()[0]
+        return len(self._memory)
+
+    def __len__(self):
+        with self._lock:
+            return self._count()
+
+    def stats(self):
+        # One consistent snapshot, even while other threads use the cache
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": self._count(),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def generate_storyboard(lines, mood, description_length, progress=None, batch_size=None, seed=None, cache=None,
+                        preferences=None):
+    # Headless entry point: lyric lines (or the whole lyric sheet as one
+    # string) -> [{"Lyric": ..., "Scene Description": ...}, ...].
+    #
+    # Repeated lines (ignoring whitespace) share one scene and are generated
+    # once. With a seed, every scene's random draws are read from the SHAKE-128
+    # stream of its SceneCache.key (scene_draws), so it depends only on the
+    # lyric, mood, length, seed and preferences: the same line comes out the
+    # same in any sheet, at any position, in any batch, and with or without a
+    # cache, which reuses scenes generated before. progress(done, total)
+    # counts distinct lines and is called once per batch, about
+    # PROGRESS_UPDATES times by default.
+    # `preferences` ({category: [elements]}) favours the given elements, see
+    # compile_mood.
+    if isinstance(lines, str):
+        lines = split_lyrics(lines)
+    else:
+        lines = [line for line in lines if line.strip()]
+    unique = list(dict.fromkeys(normalise_lyric(line) for line in lines))
+    if batch_size is None:
+        batch_size = max(1, math.ceil(len(unique) / PROGRESS_UPDATES))
+    if seed is None:
+        cache = None  # nothing to key an unseeded run on
+        rng = np.random.default_rng()
+
+    scenes = {}
+    for start in range(0, len(unique), batch_size):
+        batch = unique[start:start + batch_size]
+        if seed is None:
+            scenes.update(zip(batch, generate_scenes(
+                batch, mood, description_length, rng.random((len(batch), DRAWS_PER_SCENE)), preferences,
+            )))
+        else:
+            keys = [SceneCache.key(lyric, mood, description_length, seed, preferences) for lyric in batch]
+            found = cache.get_many(keys) if cache is not None else [None] * len(batch)
+            missing = [i for i, scene in enumerate(found) if scene is None]
+            if missing:
+                generated = generate_scenes(
+                    [batch[i] for i in missing], mood, description_length,
+                    scene_draws([keys[i] for i in missing]), preferences,
+                )
+                for i, scene in zip(missing, generated):
+                    found[i] = scene
+                if cache is not None:
+                    cache.put_many((keys[i], found[i]) for i in missing)
+            scenes.update(zip(batch, found))
+        if progress:
+            progress(len(scenes), len(unique))
+    return [{"Lyric": line, "Scene Description": scenes[normalise_lyric(line)]} for line in lines]
+
+
+def storyboard_text(scenes):
+    # Plain-text export, one numbered block per scene
+    parts = []
+    for i, scene in enumerate(scenes):
+        parts.append(f"SCENE {i+1}\n")
+        parts.append(f"LYRIC: {scene['Lyric']}\n")
+        parts.append(f"DESCRIPTION: {scene['Scene Description']}\n")
+        parts.append("="*80 + "\n\n")
+    return "".join(parts)
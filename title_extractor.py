@@ -0,0 +1,329 @@
+import argparse
+import codecs
+import itertools
+import json
+import logging
+import os
+import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Read the input this many bytes at a time so memory stays flat for huge lists
+CHUNK_SIZE = 1 << 20
+# Number of formatted output lines buffered before each write
+WRITE_BATCH = 10_000
+# Lines handed to a worker process at a time
+BATCH_LINES = 50_000
+# Below this many lines, process startup costs more than the pool saves
+MIN_PARALLEL_LINES = 200_000
+
+# Everything str.splitlines() treats as a line boundary
+LINE_BREAKS = "\r\n\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029"
+
+
+class Rule:
+    # One entry of the rule table: a regex plus how to cut the title out of a match.
+    #   before: everything before the match    after: everything after it
+    #   group:  the named group "title"
+    # `literals` is a cheap prefilter: the regex only runs when at least one of
+    # them occurs in the line (leave empty to always run it).
+    CAPTURES = ("before", "after", "group")
+
+    def __init__(self, name, pattern, capture="before", literals=()):
+        if capture not in self.CAPTURES:
+            raise ValueError(f"Unknown capture {capture!r} for rule {name!r}, expected one of {self.CAPTURES}")
+        self.name = name
+        self.pattern = re.compile(pattern)
+        if capture == "group" and "title" not in self.pattern.groupindex:
+            raise ValueError(f"Rule {name!r} uses capture='group' but has no (?P<title>...) group")
+        self.capture = capture
+        self.literals = tuple(literals)
+
+    def __repr__(self):
+        return f"Rule({self.name!r}, {self.pattern.pattern!r}, capture={self.capture!r}, literals={self.literals!r})"
+
+
+# Rules are tried in order and the first match wins; a line no rule matches
+# is returned stripped. These two reproduce the original extract_title:
+# case 1 ends the title at the first '--' or ' - <word> - ', case 2 is
+# "author - title - extra" split only on the FIRST ' - '.
+DEFAULT_RULES = (
+    Rule("dash-split", r"--| - [^-]+ - ", capture="before", literals=("-",)),
+    Rule("author-first", r" - ", capture="after", literals=(" - ",)),
+)
+
+
+def rules_from_table(table):
+    # Build rules from plain dicts, e.g. loaded from JSON:
+    #   [{"name": "...", "pattern": "...", "capture": "before", "literals": ["--"]}]
+    return tuple(Rule(row["name"], row["pattern"], row.get("capture", "before"), row.get("literals", ()))
+                 for row in table)
+
+
+def load_rules(path=None):
+    # The rules for a --rules option: a JSON rule table, or DEFAULT_RULES
+    if not path:
+        return DEFAULT_RULES
+    with open(path, encoding="utf-8") as f:
+        return rules_from_table(json.load(f))
+
+
+class TitleParser:
+    # Compiles the rule table once and only runs the rules whose literal
+    # prefilter matches the line. Keeps per-rule counters (how often a rule was
+    # tried and hit); with profile=True it also times each attempt.
+    def __init__(self, rules=DEFAULT_RULES, profile=False):
+        self.rules = tuple(rules)
+        self.profile = profile
+        # Flattened for the hot loop: (index, literals, search, rule)
+        self._table = [(i, rule.literals, rule.pattern.search, rule) for i, rule in enumerate(self.rules)]
+        # The built-in rules get the original single-search path; it keeps the
+        # same counters, only profiling needs the general loop
+        default = self.rules == DEFAULT_RULES and not profile
+        self._parse_line = self._parse_default if default else self._parse_table
+        self._dash_search = DEFAULT_RULES[0].pattern.search
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.tried = [0] * len(self.rules)
+        self.hits = [0] * len(self.rules)
+        self.seconds = [0.0] * len(self.rules)
+        self.fallbacks = 0
+
+    def merge_stats(self, stats):
+        tried, hits, seconds, fallbacks = stats
+        for i in range(len(self.rules)):
+            self.tried[i] += tried[i]
+            self.hits[i] += hits[i]
+            self.seconds[i] += seconds[i]
+        self.fallbacks += fallbacks
+
+    def snapshot(self):
+        return list(self.tried), list(self.hits), list(self.seconds), self.fallbacks
+
+    def stats(self):
+        rows = [{"rule": rule.name, "tried": self.tried[i], "hits": self.hits[i], "seconds": self.seconds[i]}
+                for i, rule in enumerate(self.rules)]
+        rows.append({"rule": "(no match)", "tried": 0, "hits": self.fallbacks, "seconds": 0.0})
+        return rows
+
+    def parse(self, line: str) -> str:
+        return self._parse_line(line, logger.isEnabledFor(logging.DEBUG))
+
+    __call__ = parse
+
+    def parse_many(self, lines):
+        # The log level is checked once for the whole batch
+        parse_line = self._parse_line
+        debug = logger.isEnabledFor(logging.DEBUG)
+        return [parse_line(line, debug) for line in lines]
+
+    def _parse_table(self, line, debug):
+        # One line through the rule table; the first matching rule wins
+        for i, literals, search, rule in self._table:
+            if literals:
+                for literal in literals:
+                    if literal in line:
+                        break
+                else:
+                    continue
+            self.tried[i] += 1
+            if self.profile:
+                start = time.perf_counter()
+                match = search(line)
+                self.seconds[i] += time.perf_counter() - start
+            else:
+                match = search(line)
+            if match:
+                self.hits[i] += 1
+                capture = rule.capture
+                if capture == "before":
+                    title = line[:match.start()].strip()
+                elif capture == "after":
+                    title = line[match.end():].strip()
+                else:
+                    title = match.group("title").strip()
+                if debug:
+                    logger.debug("rule %s: %s", rule.name, title)
+                return title
+        self.fallbacks += 1
+        title = line.strip()
+        if debug:
+            logger.debug("no rule: %s", title)
+        return title
+
+    def _parse_default(self, line, debug):
+        # DEFAULT_RULES in one search: both rules need a '-', so most plain
+        # lines skip the regex entirely, and " - " (rule 1) is a plain
+        # partition. Same titles and counters as _parse_table.
+        if "-" in line:
+            self.tried[0] += 1
+            match = self._dash_search(line)
+            if match:
+                self.hits[0] += 1
+                title = line[:match.start()].strip()
+                if debug:
+                    logger.debug("rule dash-split: %s", title)
+                return title
+            _, sep, rest = line.partition(" - ")
+            if sep:
+                self.tried[1] += 1
+                self.hits[1] += 1
+                title = rest.strip()
+                if debug:
+                    logger.debug("rule author-first: %s", title)
+                return title
+        self.fallbacks += 1
+        title = line.strip()
+        if debug:
+            logger.debug("no rule: %s", title)
+        return title
+
+
+DEFAULT_PARSER = TitleParser()
+
+
+def extract_title(line: str) -> str:
+    return DEFAULT_PARSER.parse(line)
+
+
+def iter_chunks(source, chunk_size=CHUNK_SIZE):
+    # Accept a file path or any binary file-like object (e.g. a Streamlit upload)
+    if isinstance(source, (str, bytes)) or hasattr(source, "__fspath__"):
+        with open(source, "rb") as f:
+            yield from iter(lambda: f.read(chunk_size), b"")
+    else:
+        if hasattr(source, "seek"):
+            source.seek(0)
+        yield from iter(lambda: source.read(chunk_size), b"")
+
+
+def iter_lines(source, chunk_size=CHUNK_SIZE, encoding="utf-8"):
+    # Same line splitting as str.splitlines(), but one chunk at a time.
+    # The incremental decoder keeps multi-byte characters that straddle a chunk
+    # boundary, and the last (possibly partial) line is carried into the next chunk.
+    decoder = codecs.getincrementaldecoder(encoding)()
+    pending = ""
+    for chunk in iter_chunks(source, chunk_size):
+        lines = (pending + decoder.decode(chunk)).splitlines(True)
+        # Hold the last piece back: it may be incomplete, or a '\r' whose '\n'
+        # is at the start of the next chunk
+        pending = lines.pop() if lines else ""
+        for line in lines:
+            yield line.rstrip(LINE_BREAKS)
+    pending += decoder.decode(b"", final=True)
+    for line in pending.splitlines():
+        yield line
+
+
+def iter_batches(lines, batch_size=BATCH_LINES):
+    lines = iter(lines)
+    while True:
+        batch = list(itertools.islice(lines, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def iter_titles(source, chunk_size=CHUNK_SIZE, parser=DEFAULT_PARSER):
+    for batch in iter_batches((line for line in iter_lines(source, chunk_size) if line.strip()), WRITE_BATCH):
+        yield from parser.parse_many(batch)
+
+
+def _parse_batch(parser, lines):
+    # Runs in the worker processes on an unpickled copy of the parser; its
+    # counters are sent back so the caller's stats cover the whole input
+    parser.reset_stats()
+    return parser.parse_many(lines), parser.snapshot()
+
+
+def iter_titles_parallel(source, workers=None, batch_size=BATCH_LINES,
+                         min_parallel_lines=MIN_PARALLEL_LINES, chunk_size=CHUNK_SIZE, parser=DEFAULT_PARSER):
+    # Same output, in the same order, as iter_titles, but batches of lines are
+    # parsed across a process pool. Small inputs stay in-process.
+    workers = workers or os.cpu_count() or 1
+    batches = iter_batches((line for line in iter_lines(source, chunk_size) if line.strip()), batch_size)
+
+    # Read ahead until we know whether the input is big enough to be worth a pool
+    head = []
+    seen = 0
+    for batch in batches:
+        head.append(batch)
+        seen += len(batch)
+        if seen >= min_parallel_lines:
+            break
+
+    if workers == 1 or seen < min_parallel_lines:
+        for batch in itertools.chain(head, batches):
+            yield from parser.parse_many(batch)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Keep a bounded window of batches in flight and yield them in
+        # submission order, so numbering stays stable and memory stays flat
+        in_flight = deque()
+        for batch in itertools.chain(head, batches):
+            in_flight.append(pool.submit(_parse_batch, parser, batch))
+            if len(in_flight) >= workers * 2:
+                titles, stats = in_flight.popleft().result()
+                parser.merge_stats(stats)
+                yield from titles
+        while in_flight:
+            titles, stats = in_flight.popleft().result()
+            parser.merge_stats(stats)
+            yield from titles
+
+
+def write_numbered(titles, out, batch_size=WRITE_BATCH):
+    # Writes "1. title" lines separated by newlines (no trailing newline, same as
+    # "\n".join) without ever holding the whole output in memory
+    count = 0
+    buffer = []
+    for count, title in enumerate(titles, 1):
+        buffer.append(f"{count}. {title}")
+        if len(buffer) >= batch_size:
+            out.write(("\n" if count > len(buffer) else "") + "\n".join(buffer))
+            buffer.clear()
+    if buffer:
+        out.write(("\n" if count > len(buffer) else "") + "\n".join(buffer))
+    return count
+
+
+def print_stats(title_parser, file=None):
+    # The --stats report: one line per rule, to stderr by default
+    for row in title_parser.stats():
+        print(f"{row['rule']:<24} tried={row['tried']:<10} hits={row['hits']:<10} {row['seconds'] * 1000:.1f} ms",
+              file=file or sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract book titles from a list of book lines.")
+    parser.add_argument("input", help="text file with one book per line")
+    parser.add_argument("-o", "--output", help="where to write the numbered titles (default: stdout)")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="worker processes (default: CPU count, 1 disables the pool)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_LINES, help="lines per worker batch")
+    parser.add_argument("--rules", help="JSON rule table to use instead of the built-in rules")
+    parser.add_argument("--stats", action="store_true", help="print per-rule hit counts and timings to stderr")
+    args = parser.parse_args(argv)
+
+    title_parser = TitleParser(load_rules(args.rules), profile=args.stats)
+
+    titles = iter_titles_parallel(args.input, workers=args.workers, batch_size=args.batch_size, parser=title_parser)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8", newline="\n") as out:
+            count = write_numbered(titles, out)
+    else:
+        count = write_numbered(titles, sys.stdout)
+        sys.stdout.write("\n")
+    print(f"Extracted {count} titles", file=sys.stderr)
+    if args.stats:
+        print_stats(title_parser)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,9 @@
 import streamlit as st
-import pandas as pd
-import requests
-from bs4 import BeautifulSoup
-from datetime import datetime
-from io import StringIO
+
+import toto_stats
+from export_cache import frame_download_buttons
+from toto_index import DrawIndex
+from toto_store import NUMBER_COLUMNS, STORE_PATH, DrawStore, simulated_draws
 
 # Placeholder URL - You need the actual data source or endpoint for real data
 TOTO_ARCHIVE_URL = "https://www.singaporepools.com.sg/en/product/pages/toto_results.aspx"
@@ -12,47 +12,95 @@ TOTO_ARCHIVE_URL = "https://www.singaporepools.com.sg/en/product/pages/toto_resu
 def fetch_toto_draws():
     # This function should ideally scrape or request official TOTO draw results.
     # Since we can't access SP site programmatically due to protection, we simulate data.
-    draws = []
-    for i in range(1, 500):  # simulate 500 draws
-        draws.append({
-            "Draw Number": i,
-            "Date": datetime(2023, 1, 1).strftime("%Y-%m-%d"),
-            "Time": "18:30",
-            "Winning Numbers": [1, 5, 9, 15, 23, 32],
-            "Additional Number": 42,
-            "Number of Winners": 3
-        })
-    return pd.DataFrame(draws)
+    # Used only while the local draw store is empty.
+    return simulated_draws()  # simulate 500 draws
+
+
+@st.cache_resource(show_spinner=False, max_entries=1)
+def load_draw_index(path, version):
+    # Built once per store version and shared by every session and rerun.
+    # `version` changes whenever draws are appended, which rebuilds it (only
+    # the latest index is kept); the DrawIndex never modifies its frame, so
+    # sharing it is safe.
+    if not version[0]:
+        return DrawIndex(fetch_toto_draws())
+    with DrawStore(path) as store:
+        return DrawIndex(store.load())
+
 
 # Title
 st.title("🎲 Singapore Pools TOTO Draw Viewer")
 
 # Fetch data
-df = fetch_toto_draws()
-
-df["Draw Number"] = df["Draw Number"].astype(int)
-df.sort_values("Draw Number", ascending=False, inplace=True)
-
-# Slider to scroll through draw numbers
-selected_draw = st.slider("Scroll through Draw Numbers", int(df["Draw Number"].min()), int(df["Draw Number"].max()), int(df["Draw Number"].max()))
-selected_df = df[df["Draw Number"] == selected_draw]
-
-# Display selected draw
-draw_info = selected_df.iloc[0]
-st.subheader(f"Draw #{draw_info['Draw Number']} — {draw_info['Date']} at {draw_info['Time']}")
-st.write(f"**Winning Numbers:** {draw_info['Winning Numbers']}")
-st.write(f"**Additional Number:** {draw_info['Additional Number']}")
-st.write(f"**Number of Winners:** {draw_info['Number of Winners']}")
-
-# Export complete data to CSV
-download_btn = st.download_button(
-    label="📥 Download All TOTO Draws as CSV",
-    data=df.to_csv(index=False).encode('utf-8'),
-    file_name="toto_draws_up_to_2025-04-22.csv",
-    mime="text/csv"
+with DrawStore(STORE_PATH) as store:
+    store_version = store.version()
+index = load_draw_index(STORE_PATH, store_version)
+if not store_version[0]:
+    st.caption("No scraped draws stored yet, showing simulated data.")
+
+# Sorted newest first; read-only from here on
+df = index.frame
+
+draws_tab, freq_tab, pairs_tab, gaps_tab, hot_tab = st.tabs(
+    ["🎯 Draws", "📊 Frequency", "🔗 Pairs & Triples", "⏳ Gaps", "🔥 Hot & Cold"]
 )
 
-# Display full table below
-st.markdown("---")
-st.subheader("📋 Complete Draw Record")
-st.dataframe(df, use_container_width=True, height=300)
+with draws_tab:
+    # Slider to scroll through draw numbers; st.slider needs max > min, so a
+    # single stored draw is just shown
+    if index.min == index.max:
+        selected_draw = index.max
+    else:
+        selected_draw = st.slider("Scroll through Draw Numbers", index.min, index.max, index.max)
+    selected_df = index.single(selected_draw)
+
+    # Display selected draw
+    if selected_df.empty:
+        st.warning(f"Draw #{selected_draw} is not in the store.")
+    else:
+        draw_info = selected_df.iloc[0]
+        st.subheader(f"Draw #{draw_info['Draw Number']} — {draw_info['Date']}")
+        st.write(f"**Winning Numbers:** {draw_info[NUMBER_COLUMNS].astype(int).tolist()}")
+        st.write(f"**Additional Number:** {draw_info['Additional']}")
+        st.write(f"**Number of Winners (Group 1):** {draw_info['Group 1 Winners']}")
+
+    # Export complete data; serialised only when a button is clicked, once per store version
+    frame_download_buttons(st, df, f"toto_draws_up_to_{index.max}", fingerprint=store_version,
+                           label="📥 Download All TOTO Draws as")
+
+    # Display full table below
+    st.markdown("---")
+    st.subheader("📋 Complete Draw Record")
+    st.dataframe(df, use_container_width=True, height=300)
+
+# --- Statistics over the full history (or its latest N draws) ---
+matrix = toto_stats.incidence_matrix(df)
+# st.slider needs max > min, even when only one draw is stored
+slider_max = max(len(df), 2)
+
+with freq_tab:
+    window = st.slider("Analyse the latest N draws", 1, slider_max, slider_max, key="freq_window")
+    st.bar_chart(toto_stats.frequency_table(matrix[:window]), x="Number", y="Times Drawn")
+    st.dataframe(toto_stats.frequency_table(matrix[:window]), use_container_width=True, hide_index=True)
+
+with pairs_tab:
+    window = st.slider("Analyse the latest N draws", 1, slider_max, slider_max, key="pairs_window")
+    col1, col2 = st.columns(2)
+    col1.markdown("**Most frequent pairs**")
+    col1.dataframe(toto_stats.top_pairs(matrix[:window]), use_container_width=True, hide_index=True)
+    col2.markdown("**Most frequent triples**")
+    col2.dataframe(toto_stats.top_triples(matrix[:window]), use_container_width=True, hide_index=True)
+
+with gaps_tab:
+    gap_table = toto_stats.frequency_table(matrix)[["Number", "Draws Since Last Seen"]]
+    st.bar_chart(gap_table, x="Number", y="Draws Since Last Seen")
+    st.dataframe(gap_table.sort_values("Draws Since Last Seen", ascending=False), use_container_width=True, hide_index=True)
+
+with hot_tab:
+    window = st.slider("Recent draws to compare", 1, slider_max, min(50, slider_max), key="hot_window")
+    hot, cold = toto_stats.hot_cold(matrix, window)
+    col1, col2 = st.columns(2)
+    col1.markdown("**🔥 Hot numbers**")
+    col1.dataframe(hot, use_container_width=True, hide_index=True)
+    col2.markdown("**🧊 Cold numbers**")
+    col2.dataframe(cold, use_container_width=True, hide_index=True)
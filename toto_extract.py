@@ -0,0 +1,100 @@
+import re
+import time
+from contextlib import contextmanager
+
+# The results page every backend reads; archived draws add a ?sppl= query
+RESULTS_URL = "https://www.singaporepools.com.sg/en/product/pages/toto_results.aspx"
+# Seconds to wait for a plain HTTP fetch of it
+FETCH_TIMEOUT = 30
+
+# Pulls every draw block's header, numbers and Group 1 row out of the page in a
+# single call, instead of one browser round-trip per element. Written as a JS
+# function expression so Playwright can evaluate it directly; Selenium wraps it
+# in a `return (...)()` statement.
+EXTRACT_DRAWS_JS = """
+() => Array.from(document.querySelectorAll(".drawresult"), (block) => {
+    const text = (el) => (el ? el.textContent.trim() : "");
+    const group1 = Array.from(block.querySelectorAll("table tr"))
+        .find((row) => row.textContent.includes("Group 1"));
+    const cells = group1 ? group1.querySelectorAll("td") : [];
+    return {
+        header: text(block.querySelector(".drawresultheader")),
+        numbers: Array.from(block.querySelectorAll(".drawnumber span"), text),
+        group1: cells.length > 2 ? text(cells[2]) : null,
+    };
+})
+"""
+
+# Phases every scraper backend reports through its `metrics` hook
+PHASES = ("launch", "navigation", "wait", "extraction", "dataframe")
+
+# "Thu, 17 Apr 2025 TOTO Draw 4070" or "Draw No. 4070"
+DRAW_NUMBER_RE = re.compile(r"Draw\D*?(\d+)")
+
+
+def parse_draw_number(header):
+    match = DRAW_NUMBER_RE.search(header)
+    return int(match.group(1)) if match else None
+
+
+def extract_blocks_playwright(page):
+    # Works with both the sync and the async Playwright page (await the result
+    # of the async one)
+    return page.evaluate(EXTRACT_DRAWS_JS)
+
+
+def extract_blocks_selenium(driver):
+    return driver.execute_script(f"return ({EXTRACT_DRAWS_JS})();")
+
+
+def parse_block(block):
+    # One raw block from EXTRACT_DRAWS_JS -> draw fields, or None when the
+    # result is incomplete (fewer than six winning numbers plus the additional)
+    numbers = block["numbers"]
+    if len(numbers) < 7:
+        return None
+    header = block["header"]
+    return {
+        "draw_number": parse_draw_number(header),
+        "date": header.split("TOTO Draw")[0].strip(),
+        "winning_numbers": numbers[:-1],
+        "additional_number": numbers[-1],
+        "group1_winners": block["group1"],
+    }
+
+
+def draw_records(blocks, number_by_position=True):
+    # Rows in the schema the Streamlit scraper pages use. A header without a
+    # draw number falls back to numbering by position, newest first (or None
+    # with number_by_position=False).
+    records = []
+    for i, block in enumerate(blocks):
+        draw = parse_block(block)
+        if draw is None:
+            continue  # skip incomplete results
+        draw_number = draw["draw_number"]
+        if draw_number is None and number_by_position:
+            draw_number = len(blocks) - i
+        records.append({
+            "Draw Number": draw_number,
+            "Date": draw["date"],
+            "Winning Numbers": ", ".join(draw["winning_numbers"]),
+            "Additional Number": draw["additional_number"],
+            "Group 1 Winners": draw["group1_winners"] or "Unknown",
+        })
+    return records
+
+
+@contextmanager
+def timed(metrics, phase):
+    # Scrapers take an optional metrics(phase, seconds) callable and wrap each
+    # phase in this; without a hook it costs nothing. Concurrent scrapers call
+    # the hook once per page, so sum the calls per phase.
+    if metrics is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics(phase, time.perf_counter() - start)
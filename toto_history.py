@@ -0,0 +1,134 @@
+import asyncio
+import base64
+import logging
+
+from toto_extract import RESULTS_URL, draw_records, extract_blocks_playwright, timed
+
+logger = logging.getLogger(__name__)
+
+# Pages open at the same time; each one is reused for many draws
+MAX_CONCURRENT_PAGES = 8
+# How long to wait for the results markup before giving up on a page
+RESULT_TIMEOUT_MS = 30_000
+# Images, fonts and media are never read, so don't download them
+BLOCKED_RESOURCES = {"image", "font", "media"}
+
+
+def draw_url(draw_number, url=RESULTS_URL):
+    # The archive selects a draw through a base64 encoded "DrawNumber=N" query
+    sppl = base64.b64encode(f"DrawNumber={draw_number}".encode()).decode()
+    return f"{url}?sppl={sppl}"
+
+
+async def _read_draws(page, metrics=None):
+    with timed(metrics, "extraction"):
+        blocks = await extract_blocks_playwright(page)
+    return draw_records(blocks, number_by_position=False)
+
+
+async def _load(page, url, metrics=None):
+    # Wait for the results markup itself instead of sleeping a fixed time
+    with timed(metrics, "navigation"):
+        await page.goto(url, wait_until="domcontentloaded")
+    with timed(metrics, "wait"):
+        await page.wait_for_selector(".drawresult", timeout=RESULT_TIMEOUT_MS)
+
+
+async def _block_heavy_resources(route):
+    if route.request.resource_type in BLOCKED_RESOURCES:
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+async def scrape_history_async(first_draw=1, last_draw=None, concurrency=MAX_CONCURRENT_PAGES, progress=None,
+                               url=RESULTS_URL, metrics=None):
+    # One browser and one context for the whole run; `concurrency` pages pull
+    # draw numbers from a shared queue, so at most that many loads are in flight.
+    # progress(done, total) is called as draws finish, metrics(phase, seconds)
+    # once per page and phase (see toto_extract.timed). first_draw=None reads
+    # just the latest results page. A draw whose page fails
+    # is logged and skipped; the draws that did load are always returned.
+    # Playwright is imported here so the constants above can be used without it
+    from playwright.async_api import Error as PlaywrightError
+    from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+    from playwright.async_api import async_playwright
+
+    async with async_playwright() as p:
+        with timed(metrics, "launch"):
+            browser = await p.chromium.launch(headless=True)
+        try:
+            context = await browser.new_context()
+            await context.route("**/*", _block_heavy_resources)
+
+            # The main results page shows the latest draw
+            page = await context.new_page()
+            await _load(page, url, metrics)
+            latest = await _read_draws(page, metrics)
+            await page.close()
+            if first_draw is None:
+                # Only the draws on the latest results page
+                return latest
+            if last_draw is None:
+                known = [d["Draw Number"] for d in latest if d["Draw Number"] is not None]
+                if not known:
+                    return latest
+                last_draw = max(known)
+
+            queue = asyncio.Queue()
+            for draw_number in range(last_draw, first_draw - 1, -1):
+                queue.put_nowait(draw_number)
+            total = queue.qsize()
+            draws = {d["Draw Number"]: d for d in latest if d["Draw Number"] is not None}
+            done = 0
+
+            async def worker():
+                nonlocal done
+                page = await context.new_page()
+                try:
+                    while True:
+                        try:
+                            draw_number = queue.get_nowait()
+                        except asyncio.QueueEmpty:
+                            return
+                        try:
+                            await _load(page, draw_url(draw_number, url), metrics)
+                            for draw in await _read_draws(page, metrics):
+                                if draw["Draw Number"] is not None:
+                                    draws.setdefault(draw["Draw Number"], draw)
+                        except PlaywrightTimeoutError:
+                            logger.warning("Timed out waiting for draw %d", draw_number)
+                        except PlaywrightError as exc:
+                            # e.g. net::ERR_CONNECTION_RESET; the page may be
+                            # unusable now, so carry on with a fresh one
+                            logger.warning("Draw %d failed: %s", draw_number, exc)
+                            try:
+                                await page.close()
+                            except PlaywrightError:
+                                pass
+                            page = await context.new_page()
+                        done += 1
+                        if progress:
+                            progress(done, total)
+                finally:
+                    await page.close()
+
+            # A worker that dies (e.g. it can't open a new page) doesn't take the
+            # others down; they keep draining the queue
+            results = await asyncio.gather(*(worker() for _ in range(min(concurrency, total) or 1)),
+                                           return_exceptions=True)
+            for result in results:
+                if isinstance(result, Exception):
+                    logger.error("Backfill worker stopped: %s", result)
+            return [draws[n] for n in sorted(draws, reverse=True) if first_draw <= n <= last_draw]
+        finally:
+            await browser.close()
+
+
+def scrape_toto_history(first_draw=1, last_draw=None, concurrency=MAX_CONCURRENT_PAGES, progress=None,
+                        url=RESULTS_URL, metrics=None):
+    import pandas as pd
+
+    draws = asyncio.run(scrape_history_async(first_draw, last_draw, concurrency, progress, url, metrics))
+    with timed(metrics, "dataframe"):
+        return pd.DataFrame(draws)
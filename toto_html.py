@@ -0,0 +1,118 @@
+import argparse
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import lxml.etree
+import lxml.html
+import pandas as pd
+import requests
+
+from toto_extract import FETCH_TIMEOUT, RESULTS_URL, draw_records, timed
+
+logger = logging.getLogger(__name__)
+
+# Snapshot files handed to a worker process at a time
+SNAPSHOTS_PER_TASK = 64
+
+
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# Same selectors as toto_extract.EXTRACT_DRAWS_JS, as XPath so no browser and
+# no cssselect package are needed
+BLOCK_XPATH = f"//*[{_has_class('drawresult')}]"
+HEADER_XPATH = f".//*[{_has_class('drawresultheader')}]"
+NUMBER_XPATH = f".//*[{_has_class('drawnumber')}]//span"
+ROW_XPATH = ".//table//tr"
+
+
+def parse_blocks(html):
+    # Raw results markup -> the same block dicts EXTRACT_DRAWS_JS returns, so
+    # the browser and browser-free paths share draw_records()
+    tree = lxml.html.fromstring(html)
+    blocks = []
+    for block in tree.xpath(BLOCK_XPATH):
+        headers = block.xpath(HEADER_XPATH)
+        group1 = None
+        for row in block.xpath(ROW_XPATH):
+            if "Group 1" in row.text_content():
+                cells = row.xpath("./td")
+                if len(cells) > 2:
+                    group1 = cells[2].text_content().strip()
+                break
+        blocks.append({
+            "header": headers[0].text_content().strip() if headers else "",
+            "numbers": [span.text_content().strip() for span in block.xpath(NUMBER_XPATH)],
+            "group1": group1,
+        })
+    return blocks
+
+
+def parse_results_html(html):
+    return draw_records(parse_blocks(html))
+
+
+def fetch_results(url=RESULTS_URL, session=None, metrics=None):
+    # Live fetch without a browser; pass a requests.Session to reuse connections
+    with timed(metrics, "navigation"):
+        response = (session or requests).get(url, timeout=FETCH_TIMEOUT)
+        response.raise_for_status()
+    with timed(metrics, "extraction"):
+        records = parse_results_html(response.content)
+    with timed(metrics, "dataframe"):
+        return pd.DataFrame(records)
+
+
+def _parse_files(paths):
+    records = []
+    for path in paths:
+        with open(path, "rb") as f:
+            html = f.read()
+        try:
+            blocks = parse_blocks(html)
+        except (lxml.etree.ParserError, ValueError) as exc:
+            # An empty or truncated snapshot only costs its own draws
+            logger.warning("Skipping %s: %s", path, exc)
+            continue
+        # Archived pages only show real draw numbers; don't invent any
+        records.extend(draw_records(blocks, number_by_position=False))
+    return records
+
+
+def parse_snapshot_dir(directory, workers=None):
+    # Parse every saved .html/.htm page in `directory` across a process pool.
+    # Pages that can't be parsed are logged and skipped.
+    # Draws that appear in several snapshots are kept once, newest draw first.
+    paths = sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.lower().endswith((".html", ".htm"))
+    )
+    tasks = [paths[i:i + SNAPSHOTS_PER_TASK] for i in range(0, len(paths), SNAPSHOTS_PER_TASK)]
+    if len(tasks) <= 1 or workers == 1:
+        records = [record for task in tasks for record in _parse_files(task)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            records = [record for chunk in pool.map(_parse_files, tasks) for record in chunk]
+
+    df = pd.DataFrame(records, columns=["Draw Number", "Date", "Winning Numbers", "Additional Number", "Group 1 Winners"])
+    df = df.dropna(subset=["Draw Number"]).drop_duplicates(subset=["Draw Number"])
+    df["Draw Number"] = df["Draw Number"].astype(int)
+    return df.sort_values("Draw Number", ascending=False, ignore_index=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parse saved TOTO results pages into a CSV, no browser needed.")
+    parser.add_argument("snapshots", help="directory of saved results .html pages")
+    parser.add_argument("-o", "--output", default="toto_scraped_results.csv")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    df = parse_snapshot_dir(args.snapshots, args.workers)
+    df.to_csv(args.output, index=False)
+    print(f"✅ {len(df)} draws saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import numpy as np
+
+
+class DrawIndex:
+    # Sorted draw-number index over one version of the draw table. Built once
+    # (the viewers cache it with st.cache_resource), then every single, multi
+    # or range selection is a binary search instead of a boolean mask over the
+    # whole frame. The frame is a private sorted copy, newest draw first, and
+    # is never modified after construction.
+    def __init__(self, df):
+        frame = df.drop_duplicates(subset=["Draw Number"]).astype({"Draw Number": int})
+        self.frame = frame.sort_values("Draw Number", ascending=False, ignore_index=True)
+        # Ascending copy of the keys for np.searchsorted
+        self._keys = self.frame["Draw Number"].to_numpy()[::-1].copy()
+        self._keys.setflags(write=False)
+
+    def __len__(self):
+        return len(self._keys)
+
+    @property
+    def min(self):
+        return int(self._keys[0])
+
+    @property
+    def max(self):
+        return int(self._keys[-1])
+
+    @property
+    def draw_numbers(self):
+        # Newest first, as shown in the select boxes
+        return self._keys[::-1].tolist()
+
+    def _rows(self, positions):
+        # Positions in the ascending keys -> rows of the newest-first frame
+        return len(self._keys) - 1 - positions
+
+    def single(self, draw_number):
+        pos = np.searchsorted(self._keys, draw_number)
+        if pos < len(self._keys) and self._keys[pos] == draw_number:
+            return self.frame.iloc[[self._rows(pos)]]
+        return self.frame.iloc[:0]
+
+    def multiple(self, draw_numbers):
+        wanted = np.unique(np.asarray(draw_numbers, dtype=self._keys.dtype))
+        pos = np.searchsorted(self._keys, wanted)
+        found = pos < len(self._keys)
+        found[found] = self._keys[pos[found]] == wanted[found]
+        # Rows come back newest first, like the frame
+        return self.frame.iloc[np.sort(self._rows(pos[found]))]
+
+    def range(self, low, high):
+        # Inclusive on both ends; a contiguous slice of the sorted frame
+        left = np.searchsorted(self._keys, low, side="left")
+        right = np.searchsorted(self._keys, high, side="right")
+        return self.frame.iloc[len(self._keys) - right:len(self._keys) - left]
@@ -0,0 +1,216 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import requests
+
+from toto_extract import FETCH_TIMEOUT, RESULTS_URL, draw_records
+from toto_html import parse_blocks
+from toto_store import STORE_PATH, DrawStore
+
+try:
+    import fcntl
+except ImportError:  # Windows: run without the single-instance lock
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks when running as a daemon
+DEFAULT_INTERVAL = 15 * 60
+
+
+def state_path_for(store_path):
+    return store_path + ".refresh.json"
+
+
+def log_path_for(store_path):
+    # Output of refreshers started by start_background_refresh
+    return store_path + ".refresh.log"
+
+
+def load_state(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_state(path, state):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, path)
+
+
+def record_status(store_path, status, message):
+    # Outcome of the last refresher run ("ok", "skipped" or "error") for the
+    # page to show, since background runs have no console
+    state_file = state_path_for(store_path)
+    state = load_state(state_file)
+    state.update(status=status, status_message=message, status_at=datetime.now().isoformat(timespec="seconds"))
+    save_state(state_file, state)
+
+
+def check_for_change(session, state, conditional=True):
+    # Cheap check before any parsing or browser work: a conditional GET (the
+    # server answers 304 when its ETag/Last-Modified still match), then a hash
+    # of the latest draw's header. Falls back to hashing the whole page when the
+    # header is not in the static markup. Returns (changed, new_state, blocks).
+    headers = {}
+    if conditional and state.get("etag"):
+        headers["If-None-Match"] = state["etag"]
+    if conditional and state.get("last_modified"):
+        headers["If-Modified-Since"] = state["last_modified"]
+    response = session.get(RESULTS_URL, headers=headers, timeout=FETCH_TIMEOUT)
+    new_state = dict(state, checked_at=datetime.now().isoformat(timespec="seconds"))
+    if response.status_code == 304:
+        return False, new_state, None
+    response.raise_for_status()
+
+    blocks = parse_blocks(response.content)
+    marker = blocks[0]["header"].encode("utf-8") if blocks and blocks[0]["header"] else response.content
+    new_state.update(
+        etag=response.headers.get("ETag"),
+        last_modified=response.headers.get("Last-Modified"),
+        fingerprint=hashlib.sha1(marker).hexdigest(),
+    )
+    return new_state["fingerprint"] != state.get("fingerprint"), new_state, blocks
+
+
+def refresh_once(store_path=STORE_PATH, force=False, first_draw=None, last_draw=None, concurrency=None):
+    # One refresh cycle. Returns how many new draws were stored. The state is
+    # only saved after a successful append, so a failed run is retried next time.
+    # Without first_draw only draws newer than the stored ones are fetched, and
+    # an empty store gets just the draws on the results page; the history
+    # before that is only scraped when a backfill range is asked for.
+    state_file = state_path_for(store_path)
+    state = load_state(state_file)
+    # Forced runs and backfills need the page itself, not a 304
+    wanted_anyway = force or first_draw
+    with requests.Session() as session:
+        changed, new_state, blocks = check_for_change(session, state, conditional=not wanted_anyway)
+    if not (changed or wanted_anyway):
+        logger.info("No new draws since %s", state.get("updated_at", "the last check"))
+        save_state(state_file, new_state)
+        return 0
+
+    with DrawStore(store_path) as store:
+        latest = store.latest_draw_number()
+        if first_draw is None and latest:
+            first_draw = latest + 1
+
+        # Browser-free first; the full Playwright scrape only when the static
+        # markup does not have every draw we are missing. Only real draw numbers
+        # from the headers count here, never positional guesses.
+        draws = [d for d in draw_records(blocks or [], number_by_position=False) if d["Draw Number"]]
+        newest = max((d["Draw Number"] for d in draws), default=None)
+        if first_draw is None:
+            wanted = {d["Draw Number"] for d in draws}
+        else:
+            wanted = set(range(first_draw, (last_draw or newest or first_draw) + 1))
+        if not newest or not wanted <= {d["Draw Number"] for d in draws}:
+            from toto_history import MAX_CONCURRENT_PAGES, scrape_toto_history
+
+            # With first_draw still None this only reads the latest results page
+            logger.info("Scraping draws %s..%s with Playwright", first_draw or "latest", last_draw or "latest")
+            df = scrape_toto_history(first_draw, last_draw, concurrency or MAX_CONCURRENT_PAGES)
+        else:
+            import pandas as pd
+
+            df = pd.DataFrame([d for d in draws if d["Draw Number"] in wanted])
+
+        added = store.append(df) if not df.empty else 0
+
+    new_state["updated_at"] = new_state["checked_at"]
+    new_state["last_added"] = added
+    save_state(state_file, new_state)
+    logger.info("Stored %d new draws", added)
+    return added
+
+
+def _lock(store_path):
+    # Only one refresher per store; returns None if another one holds the lock
+    handle = open(store_path + ".refresh.lock", "w")
+    if fcntl:
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return None
+    return handle
+
+
+def refresher_running(store_path=STORE_PATH):
+    # True while another process holds the store's refresh lock
+    lock = _lock(store_path)
+    if lock is None:
+        return True
+    lock.close()
+    return False
+
+
+def run(store_path=STORE_PATH, interval=DEFAULT_INTERVAL, once=False, **kwargs):
+    lock = _lock(store_path)
+    if lock is None:
+        logger.warning("Another refresher is already running for %s", store_path)
+        record_status(store_path, "skipped", "Another refresher was already running for this store; "
+                                             "try again once it has finished.")
+        return False
+    with lock:
+        while True:
+            try:
+                added = refresh_once(store_path, **kwargs)
+            except Exception as exc:
+                logger.exception("Refresh failed")
+                record_status(store_path, "error", f"{type(exc).__name__}: {exc}")
+                if once:
+                    raise
+            else:
+                record_status(store_path, "ok", f"Stored {added} new draws.")
+            if once:
+                return
+            # Range options only apply to the first cycle
+            kwargs = {}
+            time.sleep(interval)
+
+
+def start_background_refresh(store_path=STORE_PATH, *extra_args):
+    # Run one refresh cycle in a separate process so a Streamlit request never
+    # waits on the scrape; the page picks up new draws from the store later, and
+    # the outcome from the state file (record_status). Its output is appended
+    # to log_path_for(store_path).
+    with open(log_path_for(store_path), "a", encoding="utf-8") as log:
+        return subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--once", "--store", store_path, *map(str, extra_args)],
+            stdout=log,
+            stderr=subprocess.STDOUT,
+            start_new_session=True,
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Keep the local TOTO draw store up to date.")
+    parser.add_argument("--store", default=STORE_PATH, help="SQLite draw store (default: %(default)s)")
+    parser.add_argument("--interval", type=int, default=DEFAULT_INTERVAL, help="seconds between checks")
+    parser.add_argument("--once", action="store_true", help="run a single check and exit")
+    parser.add_argument("--force", action="store_true", help="scrape even if nothing seems to have changed")
+    parser.add_argument("--from-draw", type=int, help="backfill from this draw number")
+    parser.add_argument("--to-draw", type=int, help="backfill up to this draw number (default: latest)")
+    parser.add_argument("--concurrency", type=int, help="browser pages in parallel for backfills")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if run(args.store, args.interval, args.once, force=args.force, first_draw=args.from_draw,
+           last_draw=args.to_draw, concurrency=args.concurrency) is False:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
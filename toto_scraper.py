@@ -1,8 +1,27 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
 from selenium import webdriver
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
-import time
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
 import pandas as pd
+from urllib3.exceptions import HTTPError
+
+from toto_extract import RESULTS_URL, extract_blocks_selenium, parse_block, timed
+from toto_store import DrawStore
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait for the results markup before giving up on a page
+RESULT_TIMEOUT = 30
+# Warm browsers kept by a DriverPool, and page loads before one is replaced
+POOL_SIZE = 2
+MAX_USES_PER_DRIVER = 100
 
 
 def setup_driver(headless=True):
@@ -15,49 +34,188 @@ def setup_driver(headless=True):
     return driver
 
 
-def scrape_toto_results(max_draws=20):
-    url = "https://www.singaporepools.com.sg/en/product/pages/toto_results.aspx"
-    driver = setup_driver()
-    driver.get(url)
+def _quit(driver):
+    try:
+        driver.quit()
+    except Exception:
+        pass
 
-    time.sleep(5)  # Allow JavaScript to load content
 
-    draw_blocks = driver.find_elements(By.CSS_SELECTOR, ".drawresult")
+class DriverPool:
+    # Up to `size` Chrome instances shared by every scrape. Lease one with
+    #
+    #     with pool.lease() as driver:
+    #         ...
+    #
+    # A leased driver always comes back, even when the page load fails. Drivers
+    # that fail a health check or raise anything but a timeout (a dead
+    # chromedriver shows up as urllib3 connection errors, not only as
+    # WebDriverException) are quit and replaced, and
+    # a driver is retired after `max_uses` leases so Chrome's memory growth over
+    # hundreds of page loads stays bounded. Replacements start lazily.
+    def __init__(self, size=POOL_SIZE, max_uses=MAX_USES_PER_DRIVER, factory=setup_driver):
+        self.size = size
+        self.max_uses = max_uses
+        self._factory = factory
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._idle = []
+        self._uses = {}
+        self._closed = False
 
-    results = []
-    for block in draw_blocks[:max_draws]:
+    def warm(self):
+        # Start every browser up front, so the first scrapes don't pay the launch
+        with self._lock:
+            missing = self.size - len(self._idle)
+        drivers = [self._factory() for _ in range(missing)]
+        with self._lock:
+            for driver in drivers:
+                self._uses[id(driver)] = 0
+                self._idle.append(driver)
+        return self
+
+    def _healthy(self, driver):
         try:
-            header = block.find_element(By.CSS_SELECTOR, ".drawresultheader").text.strip()
-            date = header.split("TOTO Draw")[0].strip()
-
-            numbers = block.find_elements(By.CSS_SELECTOR, ".drawnumber span")
-            win_nums = [n.text for n in numbers[:-1]]
-            add_num = numbers[-1].text
-
-            prize_table = block.find_element(By.CSS_SELECTOR, ".table-responsive table")
-            rows = prize_table.find_elements(By.TAG_NAME, "tr")
-            winners = None
-            for row in rows:
-                cols = row.find_elements(By.TAG_NAME, "td")
-                if cols and "Group 1" in cols[0].text:
-                    winners = cols[2].text
-                    break
-
-            results.append({
-                "Date": date,
-                "Winning Numbers": win_nums,
-                "Additional Number": add_num,
-                "Number of Winners (Group 1)": winners
-            })
-        except Exception as e:
-            print(f"Error parsing a draw block: {e}")
+            driver.execute_script("return 1;")
+            return True
+        except Exception:
+            return False
+
+    def _acquire(self):
+        while True:
+            with self._lock:
+                if self._closed:
+                    raise RuntimeError("DriverPool is closed")
+                driver = self._idle.pop() if self._idle else None
+            if driver is None:
+                driver = self._factory()
+                with self._lock:
+                    self._uses[id(driver)] = 0
+                return driver
+            if self._healthy(driver):
+                return driver
+            self._discard(driver)
+
+    def _discard(self, driver):
+        with self._lock:
+            self._uses.pop(id(driver), None)
+        _quit(driver)
+
+    def _release(self, driver, broken):
+        with self._lock:
+            uses = self._uses.get(id(driver), 0) + 1
+            if not (broken or uses >= self.max_uses or self._closed):
+                self._uses[id(driver)] = uses
+                self._idle.append(driver)
+                return
+        self._discard(driver)
+
+    @contextmanager
+    def lease(self):
+        self._slots.acquire()
+        try:
+            driver = self._acquire()
+            broken = False
+            try:
+                yield driver
+            except Exception as exc:
+                # The browser may have crashed; don't hand it out again. A slow
+                # page is not the browser's fault.
+                broken = not isinstance(exc, TimeoutException)
+                raise
+            finally:
+                self._release(driver, broken)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for driver in idle:
+            self._discard(driver)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def load_results(driver, url, timeout=RESULT_TIMEOUT, metrics=None):
+    # Wait for the results markup itself instead of sleeping a fixed time
+    with timed(metrics, "navigation"):
+        driver.get(url)
+    with timed(metrics, "wait"):
+        WebDriverWait(driver, timeout).until(EC.presence_of_element_located((By.CSS_SELECTOR, ".drawresult")))
+
+
+def read_results(driver, max_draws=None, metrics=None):
+    # One execute_script call returns every block instead of a round-trip per element
+    with timed(metrics, "extraction"):
+        blocks = extract_blocks_selenium(driver)
+    results = []
+    for block in blocks[:max_draws]:
+        draw = parse_block(block)
+        if draw is None:
+            logger.warning("Error parsing a draw block: incomplete numbers in %r", block["header"])
             continue
+        results.append({
+            "Draw Number": draw["draw_number"],
+            "Date": draw["date"],
+            "Winning Numbers": draw["winning_numbers"],
+            "Additional Number": draw["additional_number"],
+            "Number of Winners (Group 1)": draw["group1_winners"]
+        })
+    return results
+
+
+def scrape_toto_results(max_draws=20, url=RESULTS_URL, pool=None, metrics=None):
+    # Pass a DriverPool to reuse a warm browser; without one a browser is
+    # started and shut down for this call only. metrics(phase, seconds) gets
+    # the time spent in each toto_extract.PHASES step.
+    if pool is None:
+        with DriverPool(size=1) as pool:
+            with timed(metrics, "launch"):
+                pool.warm()
+            return scrape_toto_results(max_draws, url, pool, metrics)
+    with pool.lease() as driver:
+        load_results(driver, url, metrics=metrics)
+        results = read_results(driver, max_draws, metrics)
+    with timed(metrics, "dataframe"):
+        return pd.DataFrame(results)
+
+
+def scrape_draws(draw_numbers, pool, url_for=None, metrics=None):
+    # Backfill: one page load per draw number, spread over every browser in the
+    # pool. Draws that time out or whose browser fails are logged and skipped;
+    # the draws that did load are always returned.
+    if url_for is None:
+        from toto_history import draw_url as url_for
+
+    def scrape_one(draw_number):
+        # Errors are caught outside the lease, so a crashed driver is still
+        # replaced (see DriverPool.lease)
+        try:
+            with pool.lease() as driver:
+                load_results(driver, url_for(draw_number), metrics=metrics)
+                return [d for d in read_results(driver, metrics=metrics) if d["Draw Number"] == draw_number]
+        except TimeoutException:
+            logger.warning("Timed out waiting for draw %d", draw_number)
+        except (WebDriverException, HTTPError, ConnectionError) as exc:
+            logger.warning("Draw %d failed: %s", draw_number, exc)
+        return []
 
-    driver.quit()
-    return pd.DataFrame(results)
+    with ThreadPoolExecutor(max_workers=pool.size) as executor:
+        rows = [row for draws in executor.map(scrape_one, draw_numbers) for row in draws]
+    with timed(metrics, "dataframe"):
+        return pd.DataFrame(rows)
 
 
 if __name__ == "__main__":
     df = scrape_toto_results(20)
     df.to_csv("toto_scraped_results.csv", index=False)
     print("✅ TOTO results saved to toto_scraped_results.csv")
+    with DrawStore() as store:
+        added = store.append(df)
+    print(f"✅ {added} new draws added to {store.path}")
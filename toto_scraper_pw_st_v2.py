@@ -1,69 +1,77 @@
 import streamlit as st
-import pandas as pd
-from io import StringIO
-from playwright.sync_api import sync_playwright
+
+from export_cache import frame_download_buttons
+from toto_history import MAX_CONCURRENT_PAGES
+from toto_index import DrawIndex
+from toto_refresher import load_state, log_path_for, refresher_running, start_background_refresh, state_path_for
+from toto_store import STORE_PATH, DrawStore
 
 st.set_page_config(page_title="TOTO Draw Scraper", layout="wide")
 
-# --- Playwright scraper function ---
-def scrape_toto_results():
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
-        page.goto("https://www.singaporepools.com.sg/en/product/pages/toto_results.aspx")
-        page.wait_for_timeout(6000)
-
-        blocks = page.locator(".drawresult")
-        count = blocks.count()
-
-        results = []
-
-        for i in range(count):
-            block = blocks.nth(i)
-
-            header = block.locator(".drawresultheader").text_content().strip()
-            draw_date = header.split("TOTO Draw")[0].strip()
-
-            numbers = block.locator(".drawnumber span")
-            if numbers.count() < 7:
-                continue  # skip incomplete results
-
-            win_nums = [numbers.nth(j).text_content() for j in range(numbers.count() - 1)]
-            add_num = numbers.nth(numbers.count() - 1).text_content()
-
-            group1_winners = "Unknown"
-            try:
-                rows = block.locator("table tr")
-                for r in range(rows.count()):
-                    row = rows.nth(r)
-                    if "Group 1" in row.text_content():
-                        group1_winners = row.locator("td").nth(2).text_content().strip()
-                        break
-            except:
-                pass
-
-            results.append({
-                "Draw Number": count - i,
-                "Date": draw_date,
-                "Winning Numbers": ", ".join(win_nums),
-                "Additional Number": add_num,
-                "Group 1 Winners": group1_winners
-            })
-
-        browser.close()
-        return pd.DataFrame(results)
+def load_into_session(store):
+    st.session_state["toto_df"] = store.load()
+    st.session_state["toto_version"] = store.version()
+
+
+@st.cache_resource(show_spinner=False, max_entries=1)
+def draw_index(version, _df):
+    # One sorted index per dataset version, shared across reruns; only the
+    # latest version is kept
+    return DrawIndex(_df)
+
+
+def start_refresh(started_message, *args):
+    # Only one refresher runs per store (e.g. a scheduled daemon); a second one
+    # would exit straight away, so say so instead of claiming it started
+    if refresher_running(STORE_PATH):
+        st.warning("⚠️ A refresh is already running for this store. Try again once it has finished.")
+        return
+    start_background_refresh(STORE_PATH, *args)
+    st.info(started_message)
+
 
 # --- Streamlit UI ---
 st.title("🎲 Singapore Pools TOTO Draw Scraper")
 
+# Scraping runs in toto_refresher.py, never inside a request: the buttons only
+# start a refresher process and the page reads whatever it has stored so far
 if st.button("🔄 Fetch Latest Draw Results"):
-    with st.spinner("Scraping TOTO results..."):
-        df = scrape_toto_results()
-        if df.empty or "Draw Number" not in df.columns:
-            st.error("❌ No draw data was found. Please check the site or try again.")
-            st.stop()
-        st.session_state["toto_df"] = df
-        st.success(f"✅ Fetched {len(df)} draws!")
+    start_refresh("⏳ Checking for new draws in the background, they will show up here once stored.")
+
+with DrawStore() as store:
+    latest_stored = store.latest_draw_number()
+    # Start from what earlier sessions already scraped, and pick up anything
+    # the refresher stored since the last rerun
+    if latest_stored is not None and store.version() != st.session_state.get("toto_version"):
+        load_into_session(store)
+
+refresh_state = load_state(state_path_for(STORE_PATH))
+if refresh_state.get("checked_at"):
+    st.caption(
+        f"Last checked {refresh_state['checked_at']}, "
+        f"last new draws stored {refresh_state.get('updated_at', 'never')}"
+    )
+# Outcome of the last refresher run, which has no console of its own
+status = refresh_state.get("status")
+if status == "error":
+    st.error(f"❌ Last refresh failed at {refresh_state['status_at']}: {refresh_state['status_message']} "
+             f"(details in `{log_path_for(STORE_PATH)}`)")
+elif status == "skipped":
+    st.warning(f"⚠️ Refresh skipped at {refresh_state['status_at']}: {refresh_state['status_message']}")
+if refresh_state:
+    st.button("Reload")
+
+with st.expander("📚 Backfill draw history"):
+    col1, col2, col3 = st.columns(3)
+    # Only draws newer than the stored ones need fetching
+    first_draw = col1.number_input("From draw number", min_value=1, value=(latest_stored or 0) + 1, step=1)
+    last_draw = col2.number_input("To draw number (0 = latest)", min_value=0, value=0, step=1)
+    concurrency = col3.number_input("Pages in parallel", min_value=1, max_value=32, value=MAX_CONCURRENT_PAGES)
+    if st.button("Fetch History"):
+        args = ["--from-draw", int(first_draw), "--concurrency", int(concurrency)]
+        if last_draw:
+            args += ["--to-draw", int(last_draw)]
+        start_refresh("⏳ Backfill started in the background, reload the page to see new draws.", *args)
 
 if "toto_df" in st.session_state:
     df = st.session_state["toto_df"]
@@ -71,29 +79,26 @@ if "toto_df" in st.session_state:
         st.error("❌ The required data column 'Draw Number' is missing.")
         st.stop()
 
-    draw_nums = df["Draw Number"].tolist()
+    index = draw_index(st.session_state.get("toto_version"), df)
+    draw_nums = index.draw_numbers
 
     st.subheader("🎯 View Single or Multiple Draws")
     draw_mode = st.radio("Select mode", ["Single", "Multiple", "Range"])
 
     if draw_mode == "Single":
         selected = st.selectbox("Choose a draw number:", draw_nums)
-        st.dataframe(df[df["Draw Number"] == selected])
+        st.dataframe(index.single(selected))
 
     elif draw_mode == "Multiple":
         selected = st.multiselect("Choose draw numbers:", draw_nums)
-        st.dataframe(df[df["Draw Number"].isin(selected)])
+        st.dataframe(index.multiple(selected))
 
     elif draw_mode == "Range":
-        min_draw = min(draw_nums)
-        max_draw = max(draw_nums)
-        draw_range = st.slider("Select draw number range", min_draw, max_draw, (max_draw-10, max_draw))
-        selected_df = df[(df["Draw Number"] >= draw_range[0]) & (df["Draw Number"] <= draw_range[1])]
+        min_draw = index.min
+        max_draw = max(index.max, min_draw + 1)
+        draw_range = st.slider("Select draw number range", min_draw, max_draw, (max(max_draw-10, min_draw), max_draw))
+        selected_df = index.range(*draw_range)
         st.dataframe(selected_df)
 
-    st.download_button(
-        label="📥 Download All Draws as CSV",
-        data=df.to_csv(index=False).encode("utf-8"),
-        file_name="toto_draws.csv",
-        mime="text/csv"
-    )
+    frame_download_buttons(st, df, "toto_draws", fingerprint=st.session_state.get("toto_version"),
+                           label="📥 Download All Draws as")
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+
+from toto_store import NUMBER_COLUMNS
+
+# TOTO draws 6 numbers (plus an additional) from 1..49
+POOL = 49
+BALLS = np.arange(1, POOL + 1)
+
+# Every i < j < k combination of ball indexes, for reading triples out of the
+# 49x49x49 co-occurrence cube
+_I, _J, _K = np.meshgrid(np.arange(POOL), np.arange(POOL), np.arange(POOL), indexing="ij")
+_ORDERED = (_I < _J) & (_J < _K)
+TRIPLE_I, TRIPLE_J, TRIPLE_K = _I[_ORDERED], _J[_ORDERED], _K[_ORDERED]
+PAIR_I, PAIR_J = np.triu_indices(POOL, 1)
+del _I, _J, _K, _ORDERED
+
+
+def incidence_matrix(df, include_additional=False):
+    # (n_draws x 49) uint8 matrix, row r has a 1 for every number drawn in the
+    # r-th row of `df` (the store keeps the newest draw first)
+    columns = NUMBER_COLUMNS + (["Additional"] if include_additional else [])
+    numbers = df[columns].to_numpy(dtype=np.intp) - 1
+    matrix = np.zeros((len(df), POOL), dtype=np.uint8)
+    matrix[np.arange(len(df))[:, None], numbers] = 1
+    return matrix
+
+
+def frequency(matrix):
+    return matrix.sum(axis=0, dtype=np.int64)
+
+
+def pair_counts(matrix):
+    # 49x49 co-occurrence in one matrix product; the diagonal is the frequency.
+    # float32 goes through BLAS and is exact for any realistic number of draws.
+    m = matrix.astype(np.float32)
+    return (m.T @ m).astype(np.int64)
+
+
+def triple_counts(matrix):
+    # 49x49x49 co-occurrence: a (49 x n) @ (n x 49*49) product of the matrix with
+    # its per-draw pair outer products
+    m = matrix.astype(np.float32)
+    pairs_per_draw = (m[:, :, None] * m[:, None, :]).reshape(len(m), POOL * POOL)
+    return (m.T @ pairs_per_draw).reshape(POOL, POOL, POOL).astype(np.int64)
+
+
+def gaps(matrix):
+    # Draws since each number was last seen (0 = drawn in the newest draw).
+    # Numbers never drawn get the number of draws.
+    seen = matrix.astype(bool)
+    return np.where(seen.any(axis=0), seen.argmax(axis=0), len(matrix))
+
+
+def frequency_table(matrix):
+    counts = frequency(matrix)
+    return pd.DataFrame({
+        "Number": BALLS,
+        "Times Drawn": counts,
+        "Share of Draws": counts / max(len(matrix), 1),
+        "Draws Since Last Seen": gaps(matrix),
+    })
+
+
+def top_pairs(matrix, k=20):
+    counts = pair_counts(matrix)[PAIR_I, PAIR_J]
+    top = np.argsort(counts, kind="stable")[::-1][:k]
+    return pd.DataFrame({"Pair": [f"{BALLS[PAIR_I[t]]} & {BALLS[PAIR_J[t]]}" for t in top], "Times Together": counts[top]})
+
+
+def top_triples(matrix, k=20):
+    counts = triple_counts(matrix)[TRIPLE_I, TRIPLE_J, TRIPLE_K]
+    top = np.argsort(counts, kind="stable")[::-1][:k]
+    return pd.DataFrame({
+        "Triple": [f"{BALLS[TRIPLE_I[t]]}, {BALLS[TRIPLE_J[t]]}, {BALLS[TRIPLE_K[t]]}" for t in top],
+        "Times Together": counts[top],
+    })
+
+
+def hot_cold(matrix, window, k=6):
+    # Compare each number's count over the latest `window` draws with the count
+    # it would have if every number came up equally often. Returns (hot, cold).
+    recent = matrix[:window]
+    counts = frequency(recent)
+    expected = counts.sum() / POOL
+    table = pd.DataFrame({"Number": BALLS, "Times Drawn": counts, "vs Expected": counts - expected})
+    order = np.argsort(counts, kind="stable")
+    return table.iloc[order[::-1][:k]].reset_index(drop=True), table.iloc[order[:k]].reset_index(drop=True)
+
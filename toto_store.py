@@ -0,0 +1,118 @@
+import os
+import sqlite3
+from datetime import datetime
+
+from toto_extract import timed
+
+# pandas and numpy are imported where frames are built, so the store can be
+# opened and versioned without them
+
+STORE_PATH = os.environ.get("TOTO_STORE", "toto_draws.sqlite")
+
+NUMBER_COLUMNS = ["N1", "N2", "N3", "N4", "N5", "N6"]
+COLUMNS = ["Draw Number", "Date", *NUMBER_COLUMNS, "Additional", "Group 1 Winners"]
+
+
+def _as_numbers(value):
+    # "5, 10, 21, ..." (Playwright), ['5', '10', ...] (Selenium) or a list of ints
+    if isinstance(value, str):
+        value = value.replace(",", " ").split()
+    return [int(n) for n in value]
+
+
+def normalise_draws(df):
+    # Scraper output -> one row per draw with the numbers as integer columns.
+    # Rows without a draw number or a full set of numbers are dropped.
+    import pandas as pd
+
+    rows = []
+    for draw in df.to_dict("records"):
+        try:
+            numbers = _as_numbers(draw["Winning Numbers"])
+            additional = int(draw["Additional Number"])
+            draw_number = int(draw["Draw Number"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if len(numbers) != len(NUMBER_COLUMNS):
+            continue
+        winners = draw.get("Group 1 Winners", draw.get("Number of Winners (Group 1)"))
+        rows.append([draw_number, draw.get("Date"), *numbers, additional, None if winners is None else str(winners)])
+    return pd.DataFrame(rows, columns=COLUMNS)
+
+
+def simulated_draws(count=499, metrics=None):
+    # Stand-in data for the viewer while nothing has been scraped yet
+    import pandas as pd
+
+    with timed(metrics, "extraction"):
+        draws = [{
+            "Draw Number": i,
+            "Date": datetime(2023, 1, 1).strftime("%Y-%m-%d"),
+            "Winning Numbers": [1, 5, 9, 15, 23, 32],
+            "Additional Number": 42,
+            "Group 1 Winners": "3"
+        } for i in range(1, count + 1)]
+    with timed(metrics, "dataframe"):
+        return normalise_draws(pd.DataFrame(draws))
+
+
+class DrawStore:
+    # Local SQLite store of every scraped draw, keyed by draw number. The six
+    # winning numbers and the additional number are separate integer columns,
+    # loaded as uint8 so the whole history is one small fixed-width matrix.
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        self._db = sqlite3.connect(path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS draws ("
+            "draw_number INTEGER PRIMARY KEY, date TEXT, "
+            "n1 INTEGER NOT NULL, n2 INTEGER NOT NULL, n3 INTEGER NOT NULL, "
+            "n4 INTEGER NOT NULL, n5 INTEGER NOT NULL, n6 INTEGER NOT NULL, "
+            "additional INTEGER NOT NULL, group1_winners TEXT)"
+        )
+
+    def latest_draw_number(self):
+        return self._db.execute("SELECT MAX(draw_number) FROM draws").fetchone()[0]
+
+    def version(self):
+        # Changes whenever draws are added or replaced; use it as a cache key
+        count, latest = self._db.execute("SELECT COUNT(*), MAX(draw_number) FROM draws").fetchone()
+        return count, latest, os.stat(self.path).st_mtime_ns
+
+    def append(self, df):
+        # Idempotent: appending the same draws again leaves the store unchanged
+        # (a re-scraped draw replaces the stored row). Returns how many draw
+        # numbers were not stored before.
+        draws = normalise_draws(df)
+        if draws.empty:
+            return 0
+        before = self._db.execute("SELECT COUNT(*) FROM draws").fetchone()[0]
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO draws VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                draws.astype(object).where(draws.notna(), None).itertuples(index=False, name=None),
+            )
+        return self._db.execute("SELECT COUNT(*) FROM draws").fetchone()[0] - before
+
+    def load(self):
+        # Newest draw first
+        import numpy as np
+        import pandas as pd
+
+        df = pd.read_sql_query(
+            "SELECT draw_number, date, n1, n2, n3, n4, n5, n6, additional, group1_winners "
+            "FROM draws ORDER BY draw_number DESC",
+            self._db,
+        )
+        df.columns = COLUMNS
+        df[NUMBER_COLUMNS + ["Additional"]] = df[NUMBER_COLUMNS + ["Additional"]].astype(np.uint8)
+        return df
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()